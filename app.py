@@ -1,31 +1,39 @@
 import streamlit as st
 import pandas as pd
+import io
+import functools
+import tempfile
+from pathlib import Path
 from datetime import date
-import datetime # Required for MINYEAR, MAXYEAR
-from dateutil.relativedelta import relativedelta
+
+from depreciation_pro.constants import ASSET_TYPES, GAAP_USEFUL_LIVES, MIN_CALENDAR_DATE, MAX_CALENDAR_DATE, CURRENCIES, CURRENCY_DECIMALS, DEFAULT_USEFUL_LIFE, MAX_USEFUL_LIFE
+from depreciation_pro.register import REGISTER_FILE_TYPES, load_asset_register, asset_register_from_inputs
+from depreciation_pro.methods import DEPRECIATION_METHODS, DEFAULT_METHOD
+from depreciation_pro.export import EXPORT_FORMATS, check_export, export_bytes
+from depreciation_pro.cache import DEFAULT_CACHE_ENTRIES, ScheduleCache
+from depreciation_pro.parallel import DEFAULT_SHARD_ROWS, default_workers
+from depreciation_pro.reports import build_reports, grand_totals
+from depreciation_pro.periods import days_in_month, ordinal_years, year_window
+from depreciation_pro.books import book_difference_column, book_totals, multi_book_report
+from depreciation_pro.forecast import FORECAST_MEASURES, FORECAST_STEPS, nbv_forecast
+from depreciation_pro.query import GROUP_COLUMNS, ScheduleIndex, register_groups, rollup
+from depreciation_pro.snapshots import DEFAULT_SNAPSHOT_DIR, SnapshotStore
+from depreciation_pro.diagnostics import RunDiagnostics, configure_logging, frame_shape, profile_summary
 
 # Set the page configuration first
 st.set_page_config(page_title="📊 Depreciation Pro", layout="wide", initial_sidebar_state="collapsed")
 
-# --- HIDE THE ENTIRE STREAMLIT TOOLBAR ---
-# This CSS targets the container with the data-testid 'stToolbar' and hides it completely.
-hide_toolbar_css = """
+# ------------------ Custom CSS Styling (Theme-Aware) ------------------
+# One module-level stylesheet (toolbar hiding included), emitted as a single element per run.
+APP_STYLESHEET = """
     <style>
+    /* Import Google Fonts (an @import must precede every other rule) */
+    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
+
+    /* Hide the entire Streamlit toolbar */
     [data-testid="stToolbar"] {
         display: none !important;
     }
-    </style>
-"""
-st.markdown(hide_toolbar_css, unsafe_allow_html=True)
-# --- END HIDE TOOLBAR ---
-
-
-# ------------------ Custom CSS Styling (Theme-Aware) ------------------
-def apply_custom_styling():
-    st.markdown("""
-    <style>
-    /* Import Google Fonts */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
     
     /* Global Styling */
     body, .main {
@@ -239,220 +247,337 @@ def apply_custom_styling():
         div[data-testid="stMetric"] div[data-testid="stMetricValue"] { font-size: 1.5rem; }
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
 
-# ------------------ Depreciation Logic (unchanged) ------------------
-def generate_all_potential_periods(start_date, useful_life_years, mode):
-    if mode == "Monthly":
-        num_total_periods = useful_life_years * 12
-        return [start_date + relativedelta(months=i) for i in range(num_total_periods)]
-    else: # Yearly
-        num_total_periods = useful_life_years
-        return [start_date + relativedelta(years=i) for i in range(num_total_periods)]
-
-def depreciation_row(asset_name, cost, salvage, start_date, useful_life_years, mode, provision_as_of_date):
-    depreciable_base = cost - salvage
-    if depreciable_base < 0: depreciable_base = 0.0
-    all_potential_periods = generate_all_potential_periods(start_date, useful_life_years, mode)
-    num_total_potential_periods = len(all_potential_periods)
-    if num_total_potential_periods == 0:
-        return {"Asset": asset_name, "Total Depreciation": 0.00, "Original Cost": cost, "Original Salvage": salvage}, "N/A (No periods)"
-    if mode == "Monthly":
-        dep_per_period_unrounded = depreciable_base / (useful_life_years * 12) if (useful_life_years * 12) > 0 else 0
-        potential_labels = [p.strftime("%b %Y") for p in all_potential_periods]
-    else:
-        dep_per_period_unrounded = depreciable_base / useful_life_years if useful_life_years > 0 else 0
-        potential_labels = [p.strftime("%Y") for p in all_potential_periods]
-    all_potential_dep_values = [round(dep_per_period_unrounded, 2)] * num_total_potential_periods
-    if num_total_potential_periods > 0 and depreciable_base > 0:
-        current_sum_full_life = sum(all_potential_dep_values)
-        diff_full_life = round(depreciable_base - current_sum_full_life, 2)
-        all_potential_dep_values[-1] = round(all_potential_dep_values[-1] + diff_full_life, 2)
-    actual_labels_for_schedule, actual_dep_values_for_schedule = [], []
-    for i in range(num_total_potential_periods):
-        period_date = all_potential_periods[i]
-        if period_date <= provision_as_of_date:
-            actual_labels_for_schedule.append(potential_labels[i])
-            actual_dep_values_for_schedule.append(all_potential_dep_values[i])
-        else: break
-    total_depreciation_up_to_provision = round(sum(actual_dep_values_for_schedule), 2)
-    row_data_for_schedule_df = dict(zip(actual_labels_for_schedule, actual_dep_values_for_schedule))
-    row_data_for_schedule_df.update({"Asset": asset_name, "Total Depreciation": total_depreciation_up_to_provision, "Original Cost": cost, "Original Salvage": salvage})
-    final_included_period_label = actual_labels_for_schedule[-1] if actual_labels_for_schedule else "N/A"
-    return row_data_for_schedule_df, final_included_period_label
-
-# ------------------ Constants ------------------
-ASSET_TYPES = ["Building", "Vehicle", "Machinery", "Furniture", "Computer Equipment", "Office Equipment", "Leasehold Improvements", "Land Improvements", "Software", "Intangible Asset (e.g., Patent)"]
-GAAP_USEFUL_LIVES = {
-    "US GAAP": {"Building": 40, "Vehicle": 5, "Machinery": 10, "Furniture": 7, "Computer Equipment": 5, "Office Equipment": 7, "Leasehold Improvements": 15, "Land Improvements": 15, "Software": 3, "Intangible Asset (e.g., Patent)": 10},
-    "IFRS": {"Building": 30, "Vehicle": 7, "Machinery": 8, "Furniture": 5, "Computer Equipment": 4, "Office Equipment": 5, "Leasehold Improvements": 10, "Land Improvements": 10, "Software": 3, "Intangible Asset (e.g., Patent)": 10},
-    "Indian GAAP": {"Building": 60, "Vehicle": 8, "Machinery": 15, "Furniture": 10, "Computer Equipment": 3, "Office Equipment": 5, "Leasehold Improvements": 10, "Land Improvements": 10, "Software": 6, "Intangible Asset (e.g., Patent)": 10} 
-}
-MIN_CALENDAR_DATE = datetime.date(datetime.MINYEAR, 1, 1)
-MAX_CALENDAR_DATE = datetime.date(datetime.MAXYEAR, 12, 31)
-CURRENCIES = {"USD ($)": "$", "EUR (€)": "€", "GBP (£)": "£", "JPY (¥)": "¥", "INR (₹)": "₹"}
+def apply_custom_styling():
+    st.markdown(APP_STYLESHEET, unsafe_allow_html=True)
+
+# ------------------ Cached Loaders ------------------
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_uploaded_register(file_bytes, filename):
+    return load_asset_register(io.BytesIO(file_bytes), filename)
+
+def schedule_export_bytes(schedule_store, df_summary, df_nbv, export_format):
+    # Called by the deferred download when it is clicked, not on reruns.
+    return export_bytes((df.drop(columns=["Original Cost", "Original Salvage"]) for df in schedule_store.iter_frames()), df_summary, df_nbv, export_format)
 
 # ------------------ UI ------------------
 apply_custom_styling()
 
-st.markdown("""<div class="app-main-header"><h1>📊 Depreciation Pro</h1><p>Advanced Straight-Line Depreciation Schedules with GAAP Compliance</p></div>""", unsafe_allow_html=True)
+st.markdown("""<div class="app-main-header"><h1>📊 Depreciation Pro</h1><p>Advanced Depreciation Schedules with GAAP Compliance</p></div>""", unsafe_allow_html=True)
 
 st.markdown("""<div class="app-section-header"><h2>⚙️ Global Configuration</h2></div>""", unsafe_allow_html=True)
-with st.container(border=True): 
-    gc_col1, gc_col2, gc_col3 = st.columns(3)
-    with gc_col1:
-        st.markdown("<h6>📆 Schedule Mode</h6>", unsafe_allow_html=True) 
-        mode = st.radio("Schedule Mode", ["Monthly", "Yearly"], horizontal=True, index=0, label_visibility="collapsed")
-    with gc_col2:
-        st.markdown("<h6>📅 Depreciation Provision As Of</h6>", unsafe_allow_html=True)
-        provision_as_of_date_input = st.date_input("Provision Date", value=date.today(), min_value=MIN_CALENDAR_DATE, max_value=MAX_CALENDAR_DATE, help="Calculate depreciation up to this date.", label_visibility="collapsed")
-    with gc_col3:
-        st.markdown("<h6>🪙 Currency</h6>", unsafe_allow_html=True)
-        selected_currency_label = st.selectbox("Currency", list(CURRENCIES.keys()), index=0, label_visibility="collapsed")
-        currency_symbol = CURRENCIES[selected_currency_label]
-
-st.markdown("""<div class="app-section-header"><h2>➕ Asset Configuration</h2></div>""", unsafe_allow_html=True)
-num_assets = st.number_input("Number of Assets to Configure", min_value=1, max_value=25, value=1, step=1, help="Specify how many assets you want to add to the schedule.")
-
-asset_input_data_list = []
-for i in range(num_assets):
-    with st.expander(f"📁 Asset #{i + 1}: Configuration Details", expanded=True if num_assets == 1 or i == 0 else False):
-        asset_name = st.text_input(f"Asset Name", value=f"Asset_{i+1}", key=f"name_{i}", placeholder="e.g., Main Office Building, Company Vehicle X1")
-        grid = st.columns([2,2,1]) 
-        with grid[0]:
-            st.markdown("<hr style='margin: 0.5rem 0;'>", unsafe_allow_html=True)
-            st.markdown("<h6>💰 Financials</h6>", unsafe_allow_html=True)
-            cost = st.number_input(f"Cost ({currency_symbol})", min_value=0.0, value=10000.0, step=100.0, format="%.2f", key=f"cost_{i}", help="Original purchase price of the asset")
-            salvage_value_input = st.number_input(f"Salvage Value ({currency_symbol})", min_value=0.0, value=1000.0, step=100.0, format="%.2f", key=f"salvage_{i}", help="Expected residual value at the end of its useful life")
-        with grid[1]:
-            st.markdown("<hr style='margin: 0.5rem 0;'>", unsafe_allow_html=True)
-            st.markdown("<h6>📘 Parameters</h6>", unsafe_allow_html=True)
-            start_date_input = st.date_input(f"In-Service Date", value=date.today(), min_value=MIN_CALENDAR_DATE, max_value=MAX_CALENDAR_DATE, key=f"date_{i}", help="The date the asset was placed in service")
-            gaap_standard = st.selectbox("GAAP Standard", list(GAAP_USEFUL_LIVES.keys()), key=f"gaap_{i}", help="Select accounting standard for default useful life")
-            asset_type = st.selectbox("Asset Type", ASSET_TYPES, key=f"type_{i}", help="Category of the asset")
-            default_useful_life = GAAP_USEFUL_LIVES.get(gaap_standard, {}).get(asset_type, 5)
-            useful_life_years_input = st.number_input("Useful Life (Years)", min_value=1, value=default_useful_life, step=1, key=f"life_{i}", help=f"Suggested: {default_useful_life} years for {asset_type} under {gaap_standard}")
-        with grid[2]:
-            st.markdown("<hr style='margin: 0.5rem 0;'>", unsafe_allow_html=True)
-            st.markdown("<h6>💡 Calculated</h6>", unsafe_allow_html=True)
-            depreciable_base_display = max(0, cost - min(salvage_value_input, cost))
-            st.metric(label="Depreciable Base", value=f"{currency_symbol}{depreciable_base_display:,.2f}")
-
-        if salvage_value_input > cost:
-            st.error(f"⚠️ Salvage value ({currency_symbol}{salvage_value_input:,.2f}) exceeds cost ({currency_symbol}{cost:,.2f}). Depreciable base is adjusted to {currency_symbol}0.00 for calculations.")
-        if start_date_input > provision_as_of_date_input:
-            st.warning(f"⚠️ In-Service Date ({start_date_input.strftime('%b %d, %Y')}) is after Provision Date ({provision_as_of_date_input.strftime('%b %d, %Y')}). No depreciation will be calculated for this asset in the current schedule.")
+# Inputs are batched in one form: editing a widget does not rerun the script, only the submit buttons below do.
+with st.form("schedule_inputs", border=False, enter_to_submit=False):
+    with st.container(border=True): 
+        gc_col1, gc_col2, gc_col3 = st.columns(3)
+        with gc_col1:
+            st.markdown("<h6>📆 Schedule Mode</h6>", unsafe_allow_html=True) 
+            mode = st.radio("Schedule Mode", ["Monthly", "Yearly"], horizontal=True, index=0, label_visibility="collapsed")
+        with gc_col2:
+            st.markdown("<h6>📅 Depreciation Provision As Of</h6>", unsafe_allow_html=True)
+            provision_as_of_date_input = st.date_input("Provision Date", value=date.today(), min_value=MIN_CALENDAR_DATE, max_value=MAX_CALENDAR_DATE, help="Calculate depreciation up to this date.", label_visibility="collapsed")
+        with gc_col3:
+            st.markdown("<h6>🪙 Currency</h6>", unsafe_allow_html=True)
+            selected_currency_label = st.selectbox("Currency", list(CURRENCIES.keys()), index=0, label_visibility="collapsed")
+            currency_symbol = CURRENCIES[selected_currency_label]
+            currency_decimals = CURRENCY_DECIMALS[selected_currency_label]
+        export_format = st.radio("📤 Export Format", list(EXPORT_FORMATS), horizontal=True, help="CSV and Parquet export the schedule with numeric values; Excel exports a workbook with Schedule, Summary and NBV sheets.")
+        summary_only = st.toggle("⚡ Summary only (skip full period schedule)", value=False, help="Compute accumulated depreciation, final period and NBV directly without building the period-by-period schedule. Recommended for period-end close on large registers.")
+        with st.expander("🔭 Schedule Display", expanded=False):
+            rollup_years = st.toggle("Roll up to years", value=False, disabled=mode != "Monthly", help="Show one column per calendar year instead of one per month.")
+        with st.expander("📚 Parallel Books", expanded=False):
+            compare_books = st.multiselect("Books to Compare", list(GAAP_USEFUL_LIVES.keys()), default=[], help="Depreciate every asset under each selected standard in one pass and compare NBV side by side. An asset keeps its own useful life in its own standard's book and takes the standard's default life for its asset type in the others. Differences are against the first book selected.")
+        with st.expander("🖥️ Performance", expanded=False):
+            perf_cols = st.columns(2)
+            worker_count = perf_cols[0].number_input("Worker Processes", min_value=1, max_value=default_workers(), value=1, step=1, help="Expand the schedule periods in parallel processes, one shard at a time. Results are identical to a single-process run, but it is currently slower unless that many cores are free and the register is large and Monthly on declining-balance, SYD or units methods; the pool and shared-memory copy cost about 20-30% on a single core.")
+            shard_rows = perf_cols[1].number_input("Assets per Shard", min_value=1_000, max_value=1_000_000, value=DEFAULT_SHARD_ROWS, step=1_000, help="Register rows whose periods each worker task expands.")
+            show_diagnostics = perf_cols[0].toggle("🩺 Show diagnostics", value=False, help="Time each stage of the run (engine, tables, rendering) and log it to the server console.")
+            use_cache = perf_cols[1].toggle("🗄️ Reuse unchanged assets", value=True, help=f"Keep this session's last full schedule in memory (up to {DEFAULT_CACHE_ENTRIES:,} period entries of 16 bytes) so the next run only computes assets whose inputs changed. Turn off to free the memory.")
+            use_snapshots = perf_cols[0].toggle("💾 Roll forward from snapshots", value=False, help="Imported registers only. Save each full schedule's balances and periods per register; a later provision date then copies the stored periods and only computes new periods and changed assets. Pays off most for declining-balance, SYD and units-of-production registers. Summary-only runs skip it, as computing their balances directly is faster than loading and saving a snapshot. Worker processes and the result cache are not used.")
+            snapshot_dir = perf_cols[1].text_input("Snapshot Directory", value=DEFAULT_SNAPSHOT_DIR, disabled=not use_snapshots, help="Local directory for snapshot files (one pair per register and schedule mode).")
+            profile_run = perf_cols[1].toggle("🔬 Profile next run (cProfile)", value=False, help="Record a cProfile of the whole run and offer the .pstats file for download. Adds noticeable overhead.")
+
+    st.markdown("""<div class="app-section-header"><h2>➕ Asset Configuration</h2></div>""", unsafe_allow_html=True)
+    input_source = st.radio("Asset Input", ["Manual Entry", "Import Register File"], horizontal=True, help="Configure a few assets by hand, or import a full fixed-asset register (CSV, Excel or Parquet). Click Apply Changes to switch.")
+    asset_register = None
+    # Only imported registers have an id to snapshot under; a few hand-entered assets have nothing worth rolling forward,
+    # and per-session snapshots would pile up in the shared directory.
+    register_id = None
+    if input_source == "Import Register File":
+        st.caption(f"Required columns: **name**, **cost**, **in_service_date** (one date format for the whole file, read from its first date; YYYY-MM-DD recommended). Optional: **salvage**, **gaap_standard** (US GAAP / IFRS / Indian GAAP), **asset_type**, **useful_life** (whole years up to {MAX_USEFUL_LIFE}; blank uses the GAAP default for the asset type, which must then be one of the app's types), **method** (straight-line, DDB, SYD or units of production; blank is straight-line), **total_units** and **annual_units** (units of production only; annual_units × useful_life must cover total_units).")
+        register_template = pd.DataFrame([{"name": "Main Office Building", "cost": 2500000.00, "salvage": 250000.00, "in_service_date": "2015-04-01", "gaap_standard": "US GAAP", "asset_type": "Building", "useful_life": "", "method": DEFAULT_METHOD, "total_units": "", "annual_units": ""}])
+        uploaded_register = st.file_uploader("Asset Register File", type=REGISTER_FILE_TYPES, help="One row per asset. Files are read and validated in chunks.")
+        if uploaded_register is not None:
+            try:
+                asset_register = load_uploaded_register(uploaded_register.getvalue(), uploaded_register.name)
+                register_id = uploaded_register.name
+            except (ValueError, ImportError) as e:
+                st.error(f"⚠️ Could not import register: {e}")
+            else:
+                reg_cols = st.columns(3)
+                reg_cols[0].metric("Assets Imported", f"{len(asset_register):,}")
+                reg_cols[1].metric("Total Cost", f"{currency_symbol}{asset_register['cost'].sum():,.{currency_decimals}f}")
+                reg_cols[2].metric("Starting After Provision Date", f"{int((asset_register['start_date'] > pd.Timestamp(provision_as_of_date_input)).sum()):,}")
+                st.dataframe(asset_register.head(20), use_container_width=True, hide_index=True)
+    else:
+        num_assets = st.number_input("Number of Assets to Configure", min_value=1, max_value=25, value=1, step=1, help="Specify how many assets you want to add to the schedule. Click Apply Changes to update the asset forms.")
+
+        asset_input_data_list = []
+        for i in range(num_assets):
+            with st.expander(f"📁 Asset #{i + 1}: Configuration Details", expanded=True if num_assets == 1 or i == 0 else False):
+                asset_name = st.text_input(f"Asset Name", value=f"Asset_{i+1}", key=f"name_{i}", placeholder="e.g., Main Office Building, Company Vehicle X1")
+                grid = st.columns([2,2,1]) 
+                with grid[0]:
+                    st.markdown("<hr style='margin: 0.5rem 0;'>", unsafe_allow_html=True)
+                    st.markdown("<h6>💰 Financials</h6>", unsafe_allow_html=True)
+                    cost = st.number_input(f"Cost ({currency_symbol})", min_value=0.0, value=10000.0, step=100.0, format=f"%.{currency_decimals}f", key=f"cost_{i}", help="Original purchase price of the asset")
+                    salvage_value_input = st.number_input(f"Salvage Value ({currency_symbol})", min_value=0.0, value=1000.0, step=100.0, format=f"%.{currency_decimals}f", key=f"salvage_{i}", help="Expected residual value at the end of its useful life")
+                with grid[1]:
+                    st.markdown("<hr style='margin: 0.5rem 0;'>", unsafe_allow_html=True)
+                    st.markdown("<h6>📘 Parameters</h6>", unsafe_allow_html=True)
+                    start_date_input = st.date_input(f"In-Service Date", value=date.today(), min_value=MIN_CALENDAR_DATE, max_value=MAX_CALENDAR_DATE, key=f"date_{i}", help="The date the asset was placed in service")
+                    gaap_standard = st.selectbox("GAAP Standard", list(GAAP_USEFUL_LIVES.keys()), key=f"gaap_{i}", help="Select accounting standard for default useful life")
+                    asset_type = st.selectbox("Asset Type", ASSET_TYPES, key=f"type_{i}", help="Category of the asset")
+                    default_useful_life = GAAP_USEFUL_LIVES.get(gaap_standard, {}).get(asset_type, DEFAULT_USEFUL_LIFE)
+                    useful_life_years_input = st.number_input("Useful Life (Years)", min_value=1, max_value=MAX_USEFUL_LIFE, value=None, step=1, key=f"life_{i}", placeholder=f"{default_useful_life} ({gaap_standard} default)", help=f"Leave blank for the GAAP default: {default_useful_life} years for {asset_type} under {gaap_standard}. The default follows the standard and type as last applied.")
+                    depreciation_method = st.selectbox("Depreciation Method", list(DEPRECIATION_METHODS.keys()), key=f"method_{i}", help="Double-declining balance switches to straight-line once that gives the larger charge. Every method stops at salvage value and ends on the last period of the useful life.")
+                    total_units_input, annual_units_input, life_units = 0, 0, 0
+                    if depreciation_method == "Units of Production":
+                        units_cols = st.columns(2)
+                        annual_units_input = units_cols[0].number_input("Units per Year", min_value=1, value=10_000, step=1_000, key=f"annual_units_{i}", help="Expected units per year; in Monthly mode each year's units are spread evenly over its months")
+                        life_units = annual_units_input * (useful_life_years_input or default_useful_life)
+                        total_units_input = units_cols[1].number_input("Lifetime Units", min_value=1, value=None, step=1_000, key=f"total_units_{i}", placeholder=f"{life_units:,} (per year × life)", help="Total units (output, hours, distance) the asset is expected to produce over its life. Leave blank for units per year × useful life.") or life_units
+                with grid[2]:
+                    st.markdown("<hr style='margin: 0.5rem 0;'>", unsafe_allow_html=True)
+                    st.markdown("<h6>💡 Calculated</h6>", unsafe_allow_html=True)
+                    depreciable_base_display = max(0, cost - min(salvage_value_input, cost))
+                    st.metric(label="Depreciable Base", value=f"{currency_symbol}{depreciable_base_display:,.{currency_decimals}f}")
+
+                if salvage_value_input > cost:
+                    st.error(f"⚠️ Salvage value ({currency_symbol}{salvage_value_input:,.{currency_decimals}f}) exceeds cost ({currency_symbol}{cost:,.{currency_decimals}f}). Depreciable base is adjusted to {currency_symbol}{0:.{currency_decimals}f} for calculations.")
+                if total_units_input > life_units:
+                    st.error(f"⚠️ Lifetime units ({total_units_input:,}) exceed units per year × useful life ({life_units:,}); the unused units would all be charged in the last period. Lifetime units are adjusted to {life_units:,} for calculations.")
+                if start_date_input > provision_as_of_date_input:
+                    st.warning(f"⚠️ In-Service Date ({start_date_input.strftime('%b %d, %Y')}) is after Provision Date ({provision_as_of_date_input.strftime('%b %d, %Y')}). No depreciation will be calculated for this asset in the current schedule.")
         
-        asset_input_data_list.append({"name": asset_name, "cost": cost, "salvage": max(0.0, min(salvage_value_input, cost)), "start_date": start_date_input, "useful_life": useful_life_years_input})
+                asset_input_data_list.append({"name": asset_name, "cost": cost, "salvage": max(0.0, min(salvage_value_input, cost)), "start_date": start_date_input, "gaap_standard": gaap_standard, "asset_type": asset_type, "useful_life": useful_life_years_input or default_useful_life, "method": depreciation_method, "total_units": min(total_units_input, life_units), "annual_units": annual_units_input})
+        asset_register = asset_register_from_inputs(asset_input_data_list)
 
-st.markdown("<hr>", unsafe_allow_html=True)
-if st.button("🚀 Generate Depreciation Schedule", type="primary", use_container_width=True):
+    st.markdown("<hr>", unsafe_allow_html=True)
+    submit_cols = st.columns([1, 3])
+    submit_cols[0].form_submit_button("🔄 Apply Changes", use_container_width=True, help="Update the asset forms and display options without recalculating.")
+    generate_clicked = submit_cols[1].form_submit_button("🚀 Generate Depreciation Schedule", type="primary", use_container_width=True)
+
+if input_source == "Import Register File":
+    st.download_button("⬇️ Download Register Template", register_template.to_csv(index=False).encode("utf-8"), "asset_register_template.csv", "text/csv", on_click="ignore")
+
+# Results live in session state, so display changes and downloads re-render them without recomputing;
+# only the Generate button runs the engine again.
+computed = generate_clicked and asset_register is not None
+if generate_clicked and not computed: st.warning("📂 Import a register file before generating a schedule.")
+if computed:
     with st.spinner('⏳ Calculating depreciation schedules... Please wait.'):
-        processed_asset_data_rows, asset_summary_overview_list, net_value_summary_list = [], [], []
-        for asset_spec in asset_input_data_list:
-            accumulated_depr_for_nbv, final_period_label_for_summary = 0.0, "N/A"
-            if asset_spec["start_date"] > provision_as_of_date_input:
-                row_data_from_calc = {"Asset": asset_spec["name"], "Total Depreciation": 0.0, "Original Cost": asset_spec["cost"], "Original Salvage": asset_spec["salvage"]}
-                final_period_label_for_summary = "N/A (Starts after Provision Date)"
+        if not use_cache: st.session_state.pop("schedule_cache", None)
+        elif "schedule_cache" not in st.session_state: st.session_state.schedule_cache = ScheduleCache()
+        schedule_cache = st.session_state.get("schedule_cache")
+        cache_hits_before, cache_misses_before = (schedule_cache.hits, schedule_cache.misses) if schedule_cache is not None else (0, 0)
+        if show_diagnostics: configure_logging()
+        diagnostics = RunDiagnostics(mode=mode, assets=len(asset_register))
+        if profile_run: diagnostics.start_profile()
+        snapshot_store = SnapshotStore(snapshot_dir) if use_snapshots and register_id is not None and not summary_only else None
+        try:
+            schedule_store, df_summary_calc, df_nbv_calc = build_reports(asset_register, mode, provision_as_of_date_input, summary_only=summary_only, cache=schedule_cache, workers=worker_count, shard_rows=shard_rows, diagnostics=diagnostics, snapshots=snapshot_store, register_id=register_id, decimals=currency_decimals)
+        except (OSError, ImportError) as e:
+            st.error(f"⚠️ Roll-forward snapshot unavailable: {e}")
+            st.stop()
+        df_books = multi_book_report(asset_register, compare_books, mode, provision_as_of_date_input, currency_decimals, diagnostics) if compare_books else None
+    if snapshot_store is not None:
+        snapshot_run = snapshot_store.last_run
+        snapshot_from = f"from snapshot of {snapshot_run['snapshot_date'].strftime('%B %d, %Y')}" if snapshot_run["snapshot_date"] else "no earlier snapshot"
+        run_caption = f"💾 Roll-forward ({snapshot_from}): {snapshot_run['reused']:,} assets rolled forward, {snapshot_run['recomputed']:,} computed in full, {snapshot_run['new_entries']:,} new periods" + ("" if snapshot_run["saved"] else " · snapshot kept (provision date is earlier than the snapshot)")
+    elif schedule_cache is not None and not summary_only and worker_count == 1:
+        cache_stats = schedule_cache.stats()
+        run_caption = f"🗄️ Result cache: {cache_stats['hits'] - cache_hits_before:,} assets reused, {cache_stats['misses'] - cache_misses_before:,} recomputed this run · {cache_stats['hits']:,} hits / {cache_stats['misses']:,} misses / {cache_stats['evictions']:,} evictions overall · {cache_stats['entries']:,} of {cache_stats['max_entries']:,} period entries held"
+    else: run_caption = f"🧮 All {schedule_store.num_assets:,} assets computed this run"
+    st.session_state.results = {"schedule_store": schedule_store, "df_summary": df_summary_calc, "df_nbv": df_nbv_calc, "df_books": df_books, "register": asset_register, "mode": mode, "provision_as_of_date": provision_as_of_date_input, "currency": selected_currency_label, "summary_only": summary_only, "compare_books": compare_books, "run_caption": run_caption}
+
+results = st.session_state.get("results")
+if results is not None:
+    # Render with the inputs the results were computed from; display options (roll-up, export format) apply as submitted.
+    schedule_store, df_summary_calc, df_nbv_calc, df_books, asset_register = results["schedule_store"], results["df_summary"], results["df_nbv"], results["df_books"], results["register"]
+    mode, provision_as_of_date_input, summary_only, compare_books = results["mode"], results["provision_as_of_date"], results["summary_only"], results["compare_books"]
+    currency_symbol, currency_decimals = CURRENCIES[results["currency"]], CURRENCY_DECIMALS[results["currency"]]
+    if not computed: diagnostics = RunDiagnostics(mode=mode, assets=schedule_store.num_assets)
+    if schedule_store.num_assets == 0: st.error("⚠️ No asset data processed. Configure assets or check dates.")
+    else:
+        st.markdown("""<div class="app-section-header"><h2>📊 Calculation Results</h2></div>""", unsafe_allow_html=True)
+        st.caption(results["run_caption"])
+        tab_titles = ["📋 Full Schedule", "📈 Asset Summaries", "💼 Net Value & Insights", "🔎 Range Queries"] + (["📚 Parallel Books"] if compare_books else [])
+        tab1, tab2, tab3, tab4, *book_tabs = st.tabs(tab_titles)
+        
+        def get_dynamic_df_height(df, base_height=35, row_height=35, max_height=400, min_height=100):
+            num_rows_to_account_for = len(df) + 1 if not df.empty else 0
+            calculated_height = base_height + num_rows_to_account_for * row_height
+            return min(max_height, max(min_height, calculated_height))
+        
+        def currency_column_config(columns, symbol, decimals):
+            # Values stay numeric; the browser applies the currency format.
+            return {c: st.column_config.NumberColumn(c, format=f"{symbol}%,.{decimals}f") for c in columns}
+
+        with tab1:
+            st.markdown(f"""<div style="text-align: center; margin-bottom: 1.5rem;"><h4>Full Depreciation Schedule</h4><p style="color: var(--text-color-muted, #666); font-size:0.9rem;">Up to {provision_as_of_date_input.strftime('%B %d, %Y')}</p></div>""", unsafe_allow_html=True)
+            if summary_only: st.info("⚡ Summary-only mode is on: the period-by-period schedule was not built. Turn it off in Global Configuration to see the full schedule.")
+            # The window spans the years the schedule covers and opens on the two years up to the provision date; it is keyed
+            # on the run's span so a new run starts from its own default rather than the previous run's window.
+            covered_years = ordinal_years(schedule_store.covered_periods(), mode)
+            first_year, last_year = (int(covered_years.min()), int(covered_years.max())) if len(covered_years) else (provision_as_of_date_input.year, provision_as_of_date_input.year)
+            window_end = min(max(provision_as_of_date_input.year, first_year), last_year)
+            display_years = (max(window_end - 1, first_year), window_end)
+            if first_year < last_year: display_years = st.slider("Period Window (years)", min_value=first_year, max_value=last_year, value=display_years, key=f"display_years_{first_year}_{last_year}_{window_end}", help="Only periods in this window are sent to the browser. Totals and exports always cover the full schedule.")
+            with diagnostics.stage("display_frame") as stage_record:
+                display_store = schedule_store.yearly_rollup() if rollup_years else schedule_store
+                df_display_for_tab1 = display_store.pivot(*year_window(*display_years, display_store.mode)).drop(columns=["Original Cost", "Original Salvage"])
+                stage_record.update(frame_shape(df_display_for_tab1))
+
+            if df_display_for_tab1.empty or "Asset" not in df_display_for_tab1.columns: st.info("📝 No data for schedule.")
             else:
-                row_data_from_calc, final_period_label_for_summary = depreciation_row(asset_name=asset_spec["name"], cost=asset_spec["cost"], salvage=asset_spec["salvage"], start_date=asset_spec["start_date"], useful_life_years=asset_spec["useful_life"], mode=mode, provision_as_of_date=provision_as_of_date_input)
-                accumulated_depr_for_nbv = row_data_from_calc["Total Depreciation"]
-            processed_asset_data_rows.append(row_data_from_calc)
-            asset_summary_overview_list.append({"Asset": asset_spec["name"], "Useful Life (Years)": asset_spec["useful_life"], "Accumulated Depreciation": accumulated_depr_for_nbv, "Final Included Period": final_period_label_for_summary})
-            net_value_summary_list.append({"Asset": asset_spec["name"], "Cost": asset_spec["cost"], "Accumulated Depreciation": accumulated_depr_for_nbv, "Net Book Value": asset_spec["cost"] - accumulated_depr_for_nbv})
-
-        if not processed_asset_data_rows: st.error("⚠️ No asset data processed. Configure assets or check dates.")
-        else:
-            st.markdown("""<div class="app-section-header"><h2>📊 Calculation Results</h2></div>""", unsafe_allow_html=True)
-            tab_titles = ["📋 Full Schedule", "📈 Asset Summaries", "💼 Net Value & Insights"] 
-            tab1, tab2, tab3 = st.tabs(tab_titles)
-            
-            def get_dynamic_df_height(df, base_height=35, row_height=35, max_height=400, min_height=100):
-                num_rows_to_account_for = len(df) + 1 if not df.empty else 0
-                calculated_height = base_height + num_rows_to_account_for * row_height
-                return min(max_height, max(min_height, calculated_height))
-            
-            def preformat_currency_column(df, column_name, symbol):
-                df_copy = df.copy() 
-                if column_name in df_copy.columns:
-                    df_copy[column_name] = pd.to_numeric(df_copy[column_name], errors='coerce').replace([float('inf'), float('-inf')], float('nan')).fillna(0.0).astype(float)
-                    df_copy[column_name] = df_copy[column_name].apply(lambda x: f"{symbol}{x:,.2f}")
-                return df_copy
-
-            with tab1:
-                st.markdown(f"""<div style="text-align: center; margin-bottom: 1.5rem;"><h4>Full Depreciation Schedule</h4><p style="color: var(--text-color-muted, #666); font-size:0.9rem;">Up to {provision_as_of_date_input.strftime('%B %d, %Y')}</p></div>""", unsafe_allow_html=True)
-                df_full_orig_data = pd.DataFrame(processed_asset_data_rows) 
-                df_display_cols = ["Asset"] + [c for c in df_full_orig_data.columns if c not in ["Asset", "Total Depreciation", "Original Cost", "Original Salvage"]] + ["Total Depreciation"]
-                df_display_for_tab1 = df_full_orig_data.reindex(columns=df_display_cols).copy()
-
-                if df_display_for_tab1.empty or "Asset" not in df_display_for_tab1.columns: st.info("📝 No data for schedule.")
-                else:
-                    df_display_for_tab1 = df_display_for_tab1.set_index("Asset")
-                    period_cols = [c for c in df_display_for_tab1.columns if c != "Total Depreciation"]
-                    sorted_p_cols = []
-                    if period_cols:
-                        fmt = "%b %Y" if mode == "Monthly" else "%Y"
-                        try:
-                            dt_objs = [pd.to_datetime(d, format=fmt, errors='coerce') for d in period_cols if isinstance(d, str)]
-                            s_pairs = sorted([(s, dt) for s, dt in zip([p for p in period_cols if isinstance(p,str)], dt_objs) if pd.notna(dt)], key=lambda pair: pair[1])
-                            sorted_p_cols = [p[0] for p in s_pairs if p[0] in df_display_for_tab1.columns]
-                        except Exception: sorted_p_cols = period_cols 
-                    final_cols_order = sorted_p_cols + (["Total Depreciation"] if "Total Depreciation" in df_display_for_tab1.columns else [])
-                    
-                    if final_cols_order and not df_display_for_tab1.empty:
-                        df_to_show_tab1 = df_display_for_tab1[final_cols_order].copy() 
-                        cols_to_preformat_tab1 = [c for c in df_to_show_tab1.columns if c == "Total Depreciation" or c in sorted_p_cols]
-                        for col_name in cols_to_preformat_tab1:
-                            df_to_show_tab1 = preformat_currency_column(df_to_show_tab1, col_name, currency_symbol)
-                        if not df_to_show_tab1.empty:
-                            st.dataframe(df_to_show_tab1, use_container_width=True, height=get_dynamic_df_height(df_to_show_tab1, max_height=500))
-                        else: st.info("Schedule empty after ordering.")
-                        st.markdown("<hr>", unsafe_allow_html=True)
-                        st.markdown("<h5 style='text-align:center; margin-bottom:1rem;'>Schedule Totals</h5>", unsafe_allow_html=True)
-                        total_depr_numeric = 0.0
-                        if 'Total Depreciation' in df_full_orig_data.columns: 
-                             numeric_total_dep = pd.to_numeric(df_full_orig_data['Total Depreciation'], errors='coerce').fillna(0)
-                             total_depr_numeric = numeric_total_dep.sum()
-                        total_assets = len(df_to_show_tab1) 
-                        scols = st.columns(2)
-                        scols[0].metric("Assets in Schedule", total_assets)
-                        scols[1].metric("Total Depreciation", f"{currency_symbol}{total_depr_numeric:,.2f}") 
-                        if not df_to_show_tab1.empty: 
-                            st.download_button("⬇️ Download Schedule CSV", df_to_show_tab1.reset_index().to_csv(index=False).encode('utf-8'), f"{mode.lower()}_dep_sched_{provision_as_of_date_input.strftime('%Y%m%d')}.csv", "text/csv", use_container_width=True)
-                    elif df_display_for_tab1.empty and not processed_asset_data_rows: st.info("📝 No asset data configured.")
-                    else: st.info("📅 No depreciation periods for configured assets based on dates.")
-
-            with tab2:
-                st.markdown("<h4 style='text-align:center; margin-bottom:1.5rem;'>Asset Summary Overview</h4>", unsafe_allow_html=True)
-                df_summary_orig = pd.DataFrame(asset_summary_overview_list) 
-                if not df_summary_orig.empty:
-                    df_summary_display = df_summary_orig[["Asset", "Useful Life (Years)", "Accumulated Depreciation", "Final Included Period"]].copy()
-                    df_summary_display = preformat_currency_column(df_summary_display, "Accumulated Depreciation", currency_symbol)
-                    st.dataframe(df_summary_display, use_container_width=True, hide_index=True, height=get_dynamic_df_height(df_summary_display))
-                else: st.info("📊 No data for Asset Summary Overview.")
-
-            with tab3:
-                st.markdown(f"<h4 style='text-align:center; margin-bottom:0.5rem;'>Net Book Value Summary</h4>", unsafe_allow_html=True)
-                st.markdown(f"<p style='text-align:center; color:var(--text-color-muted, #666); font-size:0.9rem; margin-bottom:1.5rem;'><em>As of {provision_as_of_date_input.strftime('%B %d, %Y')}</em></p>", unsafe_allow_html=True)
-                if net_value_summary_list:
-                    df_nbv_orig = pd.DataFrame(net_value_summary_list) 
-                    if not df_nbv_orig.empty:
-                        df_nbv_display = df_nbv_orig.copy()
-                        numeric_cost_sum = pd.to_numeric(df_nbv_display["Cost"], errors='coerce').replace([float('inf'), float('-inf')], float('nan')).fillna(0.0).sum()
-                        numeric_ad_sum = pd.to_numeric(df_nbv_display["Accumulated Depreciation"], errors='coerce').replace([float('inf'), float('-inf')], float('nan')).fillna(0.0).sum()
-                        numeric_nbv_sum = pd.to_numeric(df_nbv_display["Net Book Value"], errors='coerce').replace([float('inf'), float('-inf')], float('nan')).fillna(0.0).sum()
-                        for col_name_nbv in ["Cost", "Accumulated Depreciation", "Net Book Value"]:
-                            df_nbv_display = preformat_currency_column(df_nbv_display, col_name_nbv, currency_symbol)
-                        nbv_total_row_display = {"Asset": "**GRAND TOTAL**", "Cost": f"{currency_symbol}{numeric_cost_sum:,.2f}", "Accumulated Depreciation": f"{currency_symbol}{numeric_ad_sum:,.2f}", "Net Book Value": f"{currency_symbol}{numeric_nbv_sum:,.2f}"}
-                        df_nbv_total_display = pd.concat([df_nbv_display, pd.DataFrame([nbv_total_row_display], columns=df_nbv_display.columns)], ignore_index=True)
-                        st.dataframe(df_nbv_total_display, use_container_width=True, hide_index=True, height=get_dynamic_df_height(df_nbv_total_display))
-                        st.markdown("<hr>", unsafe_allow_html=True)
-                        st.markdown("<h5 style='text-align:center; margin-bottom:1rem;'>Financial Insights (Overall)</h5>", unsafe_allow_html=True)
-                        depr_ratio = (numeric_ad_sum / numeric_cost_sum * 100) if numeric_cost_sum > 0 else 0
-                        insights_cols = st.columns(2)
-                        insights_cols[0].metric("Depreciation Ratio", f"{depr_ratio:.1f}%", help="% of total original cost depreciated.")
-                        insights_cols[1].metric("Remaining Value Ratio", f"{100-depr_ratio:.1f}%", help="% of total original cost remaining as book value.")
-                else: st.info("💼 No data for Net Value Summary.")
+                df_display_for_tab1 = df_display_for_tab1.set_index("Asset")
+                # Period columns arrive in ordinal (chronological) order from the engine; no label parsing needed.
+                sorted_p_cols = [c for c in df_display_for_tab1.columns if c != "Total Depreciation"]
+                final_cols_order = sorted_p_cols + (["Total Depreciation"] if "Total Depreciation" in df_display_for_tab1.columns else [])
+                
+                if final_cols_order and not df_display_for_tab1.empty:
+                    df_to_show_tab1 = df_display_for_tab1[final_cols_order].fillna(0.0)
+                    if not df_to_show_tab1.empty:
+                        if not sorted_p_cols and not summary_only: st.info("📅 No depreciation periods fall inside the selected period window.")
+                        with diagnostics.stage("render_schedule", **frame_shape(df_to_show_tab1)):
+                            st.dataframe(df_to_show_tab1, use_container_width=True, height=get_dynamic_df_height(df_to_show_tab1, max_height=500), column_config=currency_column_config(final_cols_order, currency_symbol, currency_decimals))
+                    else: st.info("Schedule empty after ordering.")
+                    st.markdown("<hr>", unsafe_allow_html=True)
+                    st.markdown("<h5 style='text-align:center; margin-bottom:1rem;'>Schedule Totals</h5>", unsafe_allow_html=True)
+                    total_depr_numeric = schedule_store.total_depreciation
+                    total_assets = len(df_to_show_tab1) 
+                    scols = st.columns(2)
+                    scols[0].metric("Assets in Schedule", total_assets)
+                    scols[1].metric("Total Depreciation", f"{currency_symbol}{total_depr_numeric:,.{currency_decimals}f}") 
+                    if not df_to_show_tab1.empty: 
+                        export_extension, export_mime = EXPORT_FORMATS[export_format]
+                        # The file is only written when the button is clicked (a deferred download); limits are checked up front.
+                        try: check_export(export_format, schedule_store.num_assets, len(schedule_store.covered_periods()) + 2)
+                        except (ValueError, ImportError) as e: st.warning(f"⚠️ {export_format} export unavailable: {e}")
+                        else: st.download_button(f"⬇️ Download Schedule {export_format}", functools.partial(schedule_export_bytes, schedule_store, df_summary_calc, df_nbv_calc, export_format), f"{mode.lower()}_dep_sched_{provision_as_of_date_input.strftime('%Y%m%d')}.{export_extension}", export_mime, use_container_width=True, on_click="ignore")
+                elif df_display_for_tab1.empty and schedule_store.num_assets == 0: st.info("📝 No asset data configured.")
+                else: st.info("📅 No depreciation periods for configured assets based on dates.")
+
+        with tab2:
+            st.markdown("<h4 style='text-align:center; margin-bottom:1.5rem;'>Asset Summary Overview</h4>", unsafe_allow_html=True)
+            df_summary_orig = df_summary_calc
+            if not df_summary_orig.empty:
+                df_summary_display = df_summary_orig[["Asset", "Method", "Useful Life (Years)", "Accumulated Depreciation", "Final Included Period"]].copy()
+                with diagnostics.stage("render_summary", **frame_shape(df_summary_display)):
+                    st.dataframe(df_summary_display, use_container_width=True, hide_index=True, height=get_dynamic_df_height(df_summary_display), column_config=currency_column_config(["Accumulated Depreciation"], currency_symbol, currency_decimals))
+            else: st.info("📊 No data for Asset Summary Overview.")
+
+        @st.fragment
+        def render_nbv_forecast(register):
+            # A fragment, so running a forecast reruns only this section; the last forecast is kept with the results.
+            forecast_year = min(provision_as_of_date_input.year + 10, MAX_CALENDAR_DATE.year)
+            forecast_end = date(forecast_year, provision_as_of_date_input.month, days_in_month(forecast_year, provision_as_of_date_input.month))
+            with st.form("nbv_forecast", border=False, enter_to_submit=False):
+                forecast_cols = st.columns([2, 1, 1])
+                forecast_range = forecast_cols[0].date_input("Forecast Range", value=(provision_as_of_date_input, forecast_end), min_value=MIN_CALENDAR_DATE, max_value=MAX_CALENDAR_DATE, help="Accumulated depreciation and NBV are computed at every step month-end in this range, for every asset, in one pass.")
+                forecast_step = forecast_cols[1].selectbox("Step", list(FORECAST_STEPS), help="Month-ends, calendar quarter-ends or year-ends.")
+                forecast_measure = forecast_cols[2].selectbox("Per-Asset Measure", FORECAST_MEASURES)
+                run_forecast = st.form_submit_button("📈 Run Forecast", use_container_width=True)
+            if run_forecast:
+                if len(forecast_range) != 2: st.info("📅 Pick an end date to complete the range."); return
+                with st.spinner("⏳ Forecasting..."):
+                    results["forecast"] = nbv_forecast(register, mode, *forecast_range, forecast_step, currency_decimals)
+            forecast = results.get("forecast")
+            if forecast is None: st.caption("Choose a range and step, then run the forecast."); return
+            if len(forecast.dates) == 0: st.info("📅 No step month-end falls inside the forecast range."); return
+            df_forecast = forecast.totals()
+            forecast_totals = st.columns(3)
+            forecast_totals[0].metric(f"NBV at {df_forecast['Date'].iloc[-1].strftime('%b %d, %Y')}", f"{currency_symbol}{df_forecast['Net Book Value'].iloc[-1]:,.{currency_decimals}f}")
+            forecast_totals[1].metric("Depreciation over Forecast", f"{currency_symbol}{grand_totals(df_forecast, ['Depreciation in Step'], currency_decimals)['Depreciation in Step']:,.{currency_decimals}f}")
+            forecast_totals[2].metric("Forecast Dates", f"{len(forecast.dates):,}")
+            st.line_chart(df_forecast, x="Date", y=["Net Book Value", "Accumulated Depreciation"])
+            forecast_money_columns = ["Cost", "Depreciation in Step", "Accumulated Depreciation", "Net Book Value"]
+            st.dataframe(df_forecast, use_container_width=True, hide_index=True, height=get_dynamic_df_height(df_forecast), column_config={"Date": st.column_config.DateColumn("Date", format="YYYY-MM-DD"), **currency_column_config(forecast_money_columns, currency_symbol, currency_decimals)})
+            st.download_button("⬇️ Download Forecast Totals CSV", df_forecast.to_csv(index=False, date_format="%Y-%m-%d").encode("utf-8"), f"nbv_forecast_{forecast.dates[0]}_{forecast.dates[-1]}.csv", "text/csv", use_container_width=True, on_click="ignore")
+            df_forecast_assets = forecast.asset_frame(forecast_measure)
+            st.dataframe(df_forecast_assets, use_container_width=True, hide_index=True, height=get_dynamic_df_height(df_forecast_assets, max_height=500), column_config=currency_column_config(df_forecast_assets.columns[1:], currency_symbol, currency_decimals))
+            # The per-asset CSV can be large, so it is only written when the button is clicked (a deferred download).
+            st.download_button(f"⬇️ Download Per-Asset {forecast_measure} CSV", functools.partial(df_forecast_assets.to_csv, index=False), f"nbv_forecast_assets_{forecast.dates[0]}_{forecast.dates[-1]}.csv", "text/csv", use_container_width=True, on_click="ignore")
+
+        with tab3:
+            st.markdown(f"<h4 style='text-align:center; margin-bottom:0.5rem;'>Net Book Value Summary</h4>", unsafe_allow_html=True)
+            st.markdown(f"<p style='text-align:center; color:var(--text-color-muted, #666); font-size:0.9rem; margin-bottom:1.5rem;'><em>As of {provision_as_of_date_input.strftime('%B %d, %Y')}</em></p>", unsafe_allow_html=True)
+            if not df_nbv_calc.empty:
+                df_nbv_orig = df_nbv_calc
+                if not df_nbv_orig.empty:
+                    numeric_cost_sum, numeric_ad_sum, numeric_nbv_sum = grand_totals(df_nbv_orig, ["Cost", "Accumulated Depreciation", "Net Book Value"], currency_decimals).values()
+                    nbv_total_row_display = {"Asset": "**GRAND TOTAL**", "Cost": numeric_cost_sum, "Accumulated Depreciation": numeric_ad_sum, "Net Book Value": numeric_nbv_sum}
+                    df_nbv_total_display = pd.concat([df_nbv_orig, pd.DataFrame([nbv_total_row_display])], ignore_index=True)
+                    with diagnostics.stage("render_nbv", **frame_shape(df_nbv_total_display)):
+                        st.dataframe(df_nbv_total_display, use_container_width=True, hide_index=True, height=get_dynamic_df_height(df_nbv_total_display), column_config=currency_column_config(["Cost", "Accumulated Depreciation", "Net Book Value"], currency_symbol, currency_decimals))
+                    st.markdown("<hr>", unsafe_allow_html=True)
+                    st.markdown("<h5 style='text-align:center; margin-bottom:1rem;'>Financial Insights (Overall)</h5>", unsafe_allow_html=True)
+                    depr_ratio = (numeric_ad_sum / numeric_cost_sum * 100) if numeric_cost_sum > 0 else 0
+                    insights_cols = st.columns(2)
+                    insights_cols[0].metric("Depreciation Ratio", f"{depr_ratio:.1f}%", help="% of total original cost depreciated.")
+                    insights_cols[1].metric("Remaining Value Ratio", f"{100-depr_ratio:.1f}%", help="% of total original cost remaining as book value.")
+            else: st.info("💼 No data for Net Value Summary.")
+            st.markdown("<hr>", unsafe_allow_html=True)
+            st.markdown("<h5 style='text-align:center; margin-bottom:1rem;'>NBV Forecast</h5>", unsafe_allow_html=True)
+            render_nbv_forecast(asset_register)
+
+        @st.fragment
+        def render_range_queries(schedule_index, df_groups):
+            # A fragment, so changing the range or grouping reruns only this tab instead of the whole app.
+            range_cols = st.columns([2, 2])
+            picked_range = range_cols[0].date_input("Date Range", value=(date(provision_as_of_date_input.year, 1, 1), provision_as_of_date_input), min_value=MIN_CALENDAR_DATE, max_value=MAX_CALENDAR_DATE, help="Each date selects the whole period (month or year) it falls in. Depreciation after the provision date is not included.")
+            group_by = range_cols[1].multiselect("Group By", list(GROUP_COLUMNS.values()), default=list(GROUP_COLUMNS.values()))
+            if len(picked_range) != 2: st.info("📅 Pick an end date to complete the range."); return
+            range_start, range_end = picked_range
+            df_range = schedule_index.range_report(range_start, range_end, df_groups)
+            range_totals = grand_totals(df_range, ["Depreciation in Range", "Accumulated Depreciation", "Net Book Value"], currency_decimals)
+            qcols = st.columns(3)
+            qcols[0].metric("Depreciation in Range", f"{currency_symbol}{range_totals['Depreciation in Range']:,.{currency_decimals}f}")
+            qcols[1].metric(f"Accumulated at {range_end.strftime('%b %d, %Y')}", f"{currency_symbol}{range_totals['Accumulated Depreciation']:,.{currency_decimals}f}")
+            qcols[2].metric(f"NBV at {range_end.strftime('%b %d, %Y')}", f"{currency_symbol}{range_totals['Net Book Value']:,.{currency_decimals}f}")
+            money_columns = ["Cost", "Depreciation in Range", "Accumulated Depreciation", "Net Book Value"]
+            df_query_display = rollup(df_range, group_by, currency_decimals) if group_by else df_range
+            st.dataframe(df_query_display, use_container_width=True, hide_index=True, height=get_dynamic_df_height(df_query_display, max_height=500), column_config=currency_column_config(money_columns, currency_symbol, currency_decimals))
+            st.download_button("⬇️ Download Range Report CSV", df_query_display.to_csv(index=False).encode("utf-8"), f"depreciation_{range_start.strftime('%Y%m%d')}_{range_end.strftime('%Y%m%d')}.csv", "text/csv", use_container_width=True, on_click="ignore")
+
+        with tab4:
+            st.markdown(f"<h4 style='text-align:center; margin-bottom:1.5rem;'>Depreciation Between Dates</h4>", unsafe_allow_html=True)
+            if summary_only: st.info("⚡ Range queries need the period-by-period schedule. Turn off Summary-only mode in Global Configuration.")
+            else: render_range_queries(ScheduleIndex(schedule_store), register_groups(asset_register))
+
+        if compare_books:
+            with book_tabs[0]:
+                st.markdown(f"<h4 style='text-align:center; margin-bottom:0.5rem;'>Net Book Value by Book</h4>", unsafe_allow_html=True)
+                st.markdown(f"<p style='text-align:center; color:var(--text-color-muted, #666); font-size:0.9rem; margin-bottom:1.5rem;'><em>As of {provision_as_of_date_input.strftime('%B %d, %Y')} · differences against {compare_books[0]}</em></p>", unsafe_allow_html=True)
+                df_book_totals = book_totals(df_books, compare_books, currency_decimals)
+                book_cols = st.columns(len(compare_books))
+                for book_col, book_row in zip(book_cols, df_book_totals.to_dict("records")):
+                    book_col.metric(f"NBV · {book_row['Book']}", f"{currency_symbol}{book_row['Net Book Value']:,.{currency_decimals}f}", delta=f"{book_row[f'NBV vs {compare_books[0]}']:,.{currency_decimals}f} vs {compare_books[0]}" if book_row["Book"] != compare_books[0] else None, delta_color="off")
+                book_money_columns = ["Cost"] + [f"{column} ({book})" for book in compare_books for column in ["Accumulated", "NBV"]] + [book_difference_column(book, compare_books[0]) for book in compare_books[1:]]
+                with diagnostics.stage("render_books", **frame_shape(df_books)):
+                    st.dataframe(df_books, use_container_width=True, hide_index=True, height=get_dynamic_df_height(df_books, max_height=500), column_config=currency_column_config(book_money_columns, currency_symbol, currency_decimals))
+                st.download_button("⬇️ Download Book Comparison CSV", df_books.to_csv(index=False).encode("utf-8"), f"book_comparison_{provision_as_of_date_input.strftime('%Y%m%d')}.csv", "text/csv", use_container_width=True, on_click="ignore")
+
+    profile_path = diagnostics.stop_profile(Path(tempfile.gettempdir()) / f"depreciation_pro_{diagnostics.run_id}.pstats") if profile_run and computed else None
+    if show_diagnostics or profile_path:
+        with st.expander(f"🩺 Diagnostics · run {diagnostics.run_id} · {diagnostics.total_seconds:.3f}s across stages", expanded=False):
+            st.caption("Wall time per stage, output shape and process memory (RSS). Render stages measure server-side serialization; browser drawing is not included.")
+            st.dataframe(diagnostics.frame(), use_container_width=True, hide_index=True, column_config={"seconds": st.column_config.NumberColumn("Seconds", format="%.4f"), "rss_mb": st.column_config.NumberColumn("RSS (MB)", format="%.1f"), "rss_delta_mb": st.column_config.NumberColumn("Δ RSS (MB)", format="%+.1f"), "peak_rss_mb": st.column_config.NumberColumn("Peak RSS (MB)", format="%.1f")})
+            if profile_path:
+                st.code(profile_summary(profile_path), language="text")
+                st.download_button("⬇️ Download Profile (.pstats)", profile_path.read_bytes(), profile_path.name, "application/octet-stream", on_click="ignore")
 else:
     st.markdown("""
         <div style="text-align: center; padding: 2.5rem 1rem; background-color: var(--secondary-background-color); border: 1px solid var(--border-color, rgba(0,0,0,0.05)); border-radius: 12px; margin: 2rem 0; box-shadow: 0 4px 15px rgba(0,0,0,0.03);">
@@ -473,4 +598,4 @@ else:
     """, unsafe_allow_html=True)
 
 st.markdown("<hr>", unsafe_allow_html=True)
-st.markdown("""<div style="text-align: center; color: var(--text-color); opacity:0.7; font-size: 0.9rem; padding: 1rem 0 2rem 0;"><p><strong>Depreciation Pro</strong> | Straight-line depreciation calculator</p><p style="margin-top: 0.5rem;">Built with Streamlit | Supports US GAAP, IFRS, Indian GAAP</p></div>""", unsafe_allow_html=True)
+st.markdown("""<div style="text-align: center; color: var(--text-color); opacity:0.7; font-size: 0.9rem; padding: 1rem 0 2rem 0;"><p><strong>Depreciation Pro</strong> | Straight-line, declining-balance, sum-of-years' digits and units-of-production depreciation</p><p style="margin-top: 0.5rem;">Built with Streamlit | Supports US GAAP, IFRS, Indian GAAP</p></div>""", unsafe_allow_html=True)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from depreciation_pro.constants import ASSET_TYPES, GAAP_USEFUL_LIVES
+from depreciation_pro.methods import DEPRECIATION_METHODS
+
+# Synthetic registers in the shape load_asset_register returns: mixed GAAP standards and asset types with their
+# default lives, in-service dates spread from FIRST_IN_SERVICE to a little past the provision date.
+FIRST_IN_SERVICE = "1990-01-01"
+
+def synthetic_register(num_assets, provision_as_of_date, seed=0):
+    rng = np.random.default_rng(seed)
+    standards = np.array(list(GAAP_USEFUL_LIVES))
+    asset_types = np.array(ASSET_TYPES)
+    gaap_standard = standards[rng.integers(0, len(standards), num_assets)]
+    asset_type = asset_types[rng.integers(0, len(asset_types), num_assets)]
+    lives = {(s, t): life for s, by_type in GAAP_USEFUL_LIVES.items() for t, life in by_type.items()}
+    useful_life = np.array([lives[key] for key in zip(gaap_standard.tolist(), asset_type.tolist())], dtype=np.int64)
+    cost = np.round(np.exp(rng.uniform(np.log(500), np.log(5_000_000), num_assets)), 2)
+    salvage = np.round(cost * rng.uniform(0, 0.2, num_assets), 2)
+    first_day = np.datetime64(FIRST_IN_SERVICE, "D")
+    span_days = (np.datetime64(provision_as_of_date, "D") - first_day).astype(np.int64) + 365
+    start_date = first_day + rng.integers(0, span_days, num_assets).astype("timedelta64[D]")
+    return pd.DataFrame({
+        "name": [f"Asset {i:07d}" for i in range(num_assets)],
+        "cost": cost,
+        "salvage": salvage,
+        "start_date": pd.to_datetime(start_date),
+        "gaap_standard": gaap_standard,
+        "asset_type": asset_type,
+        "useful_life": useful_life,
+    })
+
+def mixed_method_register(num_assets, provision_as_of_date, seed=0):
+    # synthetic_register with every depreciation method, and units-of-production figures that fit each asset's life.
+    register = synthetic_register(num_assets, provision_as_of_date, seed)
+    rng = np.random.default_rng(seed)
+    register["method"] = rng.choice(list(DEPRECIATION_METHODS), len(register))
+    register["annual_units"] = rng.integers(1, 3_000, len(register))
+    register["total_units"] = rng.integers(1, register["annual_units"] * register["useful_life"] + 1)
+    return register
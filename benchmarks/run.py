@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from depreciation_pro.books import multi_book_report
+from depreciation_pro.cache import ScheduleCache
+from depreciation_pro.constants import GAAP_USEFUL_LIVES
+from depreciation_pro.engine import asset_terms
+from depreciation_pro.forecast import nbv_forecast
+from depreciation_pro.export import write_csv, write_parquet
+from depreciation_pro.parallel import default_workers
+from depreciation_pro.periods import days_in_month, year_window
+from depreciation_pro.reports import build_reports, register_arrays
+from depreciation_pro.snapshots import SnapshotStore
+from depreciation_pro.store import ScheduleStore
+
+from .registers import synthetic_register
+
+# Times each stage of schedule generation on synthetic registers and writes the results as JSON.
+# Each stage is timed --repeat times (best and mean are kept), then run once more under tracemalloc for its
+# peak Python/numpy allocation, so tracing overhead never leaks into the timings.
+PRESETS = {"quick": [100, 10_000], "full": [100, 10_000, 1_000_000]}
+MODES = ["Monthly", "Yearly"]
+DEFAULT_PROVISION_DATE = date(2025, 12, 31)
+DEFAULT_MAX_EXPORT_ASSETS = 100_000
+DEFAULT_THRESHOLD = 1.10
+MIN_REGRESSION_SECONDS = 0.005  # slowdowns smaller than this are timer noise, whatever the ratio
+
+def stage_asset_terms(ctx):
+    _, costs, salvages, starts, lives = register_arrays(ctx["register"])
+    return asset_terms(costs, salvages, starts, lives, ctx["mode"], ctx["provision"])
+
+def stage_build_reports(ctx):
+    return build_reports(ctx["register"], ctx["mode"], ctx["provision"])
+
+def stage_parallel_reports(ctx):
+    # build_reports with the period expansion spread over --workers processes; compare against build_reports.
+    return build_reports(ctx["register"], ctx["mode"], ctx["provision"], workers=ctx["workers"])
+
+def stage_cached_rerun(ctx):
+    # build_reports through a warm ScheduleCache after 1% of the assets were edited: runs alternate between the register
+    # and a copy with every hundredth salvage changed, so each run recomputes those assets and reuses the rest.
+    if "schedule_cache" not in ctx:
+        edited = ctx["register"].copy()
+        edited.loc[::100, "salvage"] += 1.0
+        ctx["cached_registers"] = [ctx["register"], edited]
+        ctx["schedule_cache"] = ScheduleCache()
+        build_reports(ctx["register"], ctx["mode"], ctx["provision"], cache=ctx["schedule_cache"])
+    ctx["cached_registers"].reverse()
+    return build_reports(ctx["cached_registers"][0], ctx["mode"], ctx["provision"], cache=ctx["schedule_cache"])
+
+def month_end(day, months_later):
+    year, month = divmod(day.year * 12 + day.month - 1 + months_later, 12)
+    return date(year, month + 1, days_in_month(year, month + 1))
+
+def stage_snapshot_rollforward(ctx):
+    # Month-end close: build_reports rolled forward one month from the previous run's snapshot (the first run rolls from
+    # a snapshot taken a month before the provision date), including the snapshot load and save.
+    if "snapshot_dir" not in ctx:
+        ctx["snapshot_dir"] = tempfile.TemporaryDirectory(prefix="depreciation_bench_")
+        ctx["snapshot_store"] = SnapshotStore(ctx["snapshot_dir"].name)
+        ctx["snapshot_months"] = 0
+        build_reports(ctx["register"], ctx["mode"], month_end(ctx["provision"], -1), snapshots=ctx["snapshot_store"], register_id="benchmark")
+    provision = month_end(ctx["provision"], ctx["snapshot_months"])
+    ctx["snapshot_months"] += 1
+    return build_reports(ctx["register"], ctx["mode"], provision, snapshots=ctx["snapshot_store"], register_id="benchmark")
+
+def stage_multi_book(ctx):
+    # Every GAAP standard in one pass; compare against build_reports for the cost of the extra books.
+    return multi_book_report(ctx["register"], list(GAAP_USEFUL_LIVES), ctx["mode"], ctx["provision"])
+
+def stage_nbv_forecast(ctx):
+    # Register-wide and per-asset NBV at each month-end of the ten years after the provision date.
+    end_year, end_month = ctx["provision"].year + 10, ctx["provision"].month
+    return nbv_forecast(ctx["register"], ctx["mode"], ctx["provision"], date(end_year, end_month, days_in_month(end_year, end_month)), "Month-End").totals()
+
+def stage_display_frame(ctx):
+    # What the Full Schedule tab sends to the browser by default: the two calendar years up to the provision date.
+    schedule_store = ctx["build_reports"][0]
+    window = year_window(ctx["provision"].year - 1, ctx["provision"].year, ctx["mode"])
+    return schedule_store.pivot(*window).drop(columns=["Original Cost", "Original Salvage"]).set_index("Asset").fillna(0.0)
+
+def stage_yearly_rollup(ctx):
+    return ctx["build_reports"][0].yearly_rollup().pivot()
+
+def stage_export_csv(ctx):
+    with tempfile.TemporaryFile() as f:
+        write_csv(ctx["build_reports"][0].iter_frames(), f)
+        return f.tell()
+
+def stage_export_parquet(ctx):
+    with tempfile.TemporaryFile() as f:
+        write_parquet(ctx["build_reports"][0].iter_frames(), f)
+        return f.tell()
+
+# (name, function, applies to (num_assets, mode, args)); later stages read earlier results from ctx by name.
+STAGES = [
+    ("asset_terms", stage_asset_terms, lambda n, mode, args: True),
+    ("build_reports", stage_build_reports, lambda n, mode, args: True),
+    ("parallel_reports", stage_parallel_reports, lambda n, mode, args: args.workers > 1),
+    ("cached_rerun", stage_cached_rerun, lambda n, mode, args: True),
+    ("snapshot_rollforward", stage_snapshot_rollforward, lambda n, mode, args: True),
+    ("multi_book", stage_multi_book, lambda n, mode, args: True),
+    ("nbv_forecast", stage_nbv_forecast, lambda n, mode, args: True),
+    ("display_frame", stage_display_frame, lambda n, mode, args: True),
+    ("yearly_rollup", stage_yearly_rollup, lambda n, mode, args: mode == "Monthly"),
+    ("export_csv", stage_export_csv, lambda n, mode, args: n <= args.max_export_assets),
+    ("export_parquet", stage_export_parquet, lambda n, mode, args: n <= args.max_export_assets),
+]
+
+def result_shape(result):
+    if isinstance(result, pd.DataFrame):
+        return {"rows": len(result), "columns": len(result.columns)}
+    if isinstance(result, tuple) and result and isinstance(result[0], ScheduleStore):
+        return {"entries": len(result[0].amounts), "store_mb": round(result[0].nbytes / 2**20, 2)}
+    if isinstance(result, int):
+        return {"bytes": result}
+    return {}
+
+def measure(fn, ctx, repeat, track_memory):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(ctx)
+        timings.append(time.perf_counter() - started)
+    measured = {"best_s": round(min(timings), 6), "mean_s": round(sum(timings) / len(timings), 6)}
+    if track_memory:
+        del result
+        tracemalloc.start()
+        result = fn(ctx)
+        measured["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+    return result, measured
+
+def run_case(num_assets, mode, args):
+    ctx = {"mode": mode, "provision": args.provision_date, "workers": args.workers}
+    started = time.perf_counter()
+    ctx["register"] = synthetic_register(num_assets, args.provision_date, args.seed)
+    print(f"{num_assets:>9,} {mode:<8} register generated in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    rows = []
+    for name, fn, applies in STAGES:
+        if args.stages and name not in args.stages or not applies(num_assets, mode, args):
+            continue
+        repeat = args.repeat if num_assets < 1_000_000 else 1
+        try:
+            ctx[name], measured = measure(fn, ctx, repeat, not args.no_memory)
+        except ImportError as e:
+            print(f"{num_assets:>9,} {mode:<8} {name:<20} skipped: {e}", file=sys.stderr)
+            continue
+        rows.append({"assets": num_assets, "mode": mode, "stage": name, **measured, **result_shape(ctx[name])})
+        print(f"{num_assets:>9,} {mode:<8} {name:<20} {measured['best_s']:>9.4f}s" + (f" {measured['peak_mb']:>9.1f} MB" if "peak_mb" in measured else ""), file=sys.stderr)
+    return rows
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__, "platform": platform.platform(), "cpus": os.cpu_count(), "commit": commit}
+
+def compare(results, baseline, threshold):
+    # Prints best-time ratios against a baseline results file; returns the number of stages slower than threshold.
+    previous = {(r["assets"], r["mode"], r["stage"]): r for r in baseline["results"]}
+    regressions = 0
+    print(f"{'assets':>9} {'mode':<8} {'stage':<20} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for r in results:
+        before = previous.get((r["assets"], r["mode"], r["stage"]))
+        if before is None:
+            continue
+        ratio = r["best_s"] / before["best_s"] if before["best_s"] else float("inf")
+        flag = " REGRESSION" if ratio > threshold and r["best_s"] - before["best_s"] > MIN_REGRESSION_SECONDS else ""
+        regressions += bool(flag)
+        print(f"{r['assets']:>9,} {r['mode']:<8} {r['stage']:<20} {before['best_s']:>9.4f}s {r['best_s']:>9.4f}s {ratio:>6.2f}x{flag}")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the depreciation engine, schedule store, display frame and export on synthetic registers.")
+    parser.add_argument("--preset", choices=list(PRESETS), default="quick", help="Register sizes: quick = 100 and 10k assets, full adds 1M (default: quick).")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Explicit register sizes; overrides --preset.")
+    parser.add_argument("--modes", choices=MODES, nargs="+", default=MODES, help="Schedule modes to run (default: both).")
+    parser.add_argument("--stages", choices=[name for name, _, _ in STAGES], nargs="+", help="Only run these stages (default: all). Later stages need build_reports.")
+    parser.add_argument("--provision-date", type=date.fromisoformat, default=DEFAULT_PROVISION_DATE, help=f"Provision date for every run (default: {DEFAULT_PROVISION_DATE}).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage; 1M-asset registers always run once (default: 3).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic registers (default: 0).")
+    parser.add_argument("--workers", type=int, default=default_workers(), help=f"Worker processes for the parallel_reports stage, which is skipped for 1 (default: this machine's {default_workers()} CPUs).")
+    parser.add_argument("--max-export-assets", type=int, default=DEFAULT_MAX_EXPORT_ASSETS, help=f"Skip export stages above this many assets (default: {DEFAULT_MAX_EXPORT_ASSETS:,}).")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory run.")
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"), help="Results file (default: bench_results.json).")
+    parser.add_argument("--baseline", type=Path, help="Earlier results file to compare best times against.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help=f"Slowdown ratio reported as a regression (default: {DEFAULT_THRESHOLD}).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    for num_assets in args.sizes or PRESETS[args.preset]:
+        for mode in args.modes:
+            results.extend(run_case(num_assets, mode, args))
+    report = {"created": datetime.now().isoformat(timespec="seconds"), "provision_date": args.provision_date.isoformat(), "seed": args.seed, "environment": environment(), "results": results}
+    args.output.write_text(json.dumps(report, indent=2))
+    print(args.output, file=sys.stderr)
+    if args.baseline is not None:
+        return 1 if compare(results, json.loads(args.baseline.read_text()), args.threshold) else 0
+    return 0
@@ -0,0 +1 @@
+# Marks the repository root for pytest, so tests import depreciation_pro and benchmarks from the working tree.
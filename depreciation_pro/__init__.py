@@ -0,0 +1,10 @@
+# Depreciation Pro calculation engine. Importable without Streamlit; pandas-based helpers live in
+# depreciation_pro.register (register import) and depreciation_pro.reports (schedule/summary/NBV frames).
+from .constants import ASSET_TYPES, GAAP_USEFUL_LIVES, MIN_CALENDAR_DATE, MAX_CALENDAR_DATE, CURRENCIES, CURRENCY_DECIMALS, DEFAULT_DECIMALS, DEFAULT_USEFUL_LIFE, MAX_USEFUL_LIFE
+from .methods import MethodInputs, DEPRECIATION_METHODS, DEFAULT_METHOD, method_inputs, cumulative_depreciation, period_amounts
+from .periods import period_ordinal, period_label, period_labels, label_table, date_ordinals, ordinal_years, year_window
+from .engine import (
+    generate_all_potential_periods, depreciation_row, periods_elapsed, straight_line_amounts, AssetTerms, asset_terms,
+    depreciation_summary, final_period_labels, covered_period_ordinals, schedule_matrix, depreciation_matrix,
+    to_minor_units, to_major_units, divide_half_up,
+)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from .constants import DEFAULT_DECIMALS, DEFAULT_USEFUL_LIFE, GAAP_USEFUL_LIVES
+from .diagnostics import timed
+from .engine import AssetTerms, asset_terms, to_major_units, to_minor_units
+from .methods import units_within_life
+from .reports import register_arrays, register_method_inputs
+
+# Parallel books: the same register depreciated under several GAAP standards (e.g. statutory Indian GAAP next to
+# group US GAAP or IFRS) in one engine pass. Only the useful life differs between books. An asset keeps its register
+# life in the book of its own gaap_standard and takes the standard's default life for its asset type in every other book.
+
+def book_useful_lives(register, books):
+    # (books x assets) int64 lives. Asset types are factorized once; each book then maps type codes through a small
+    # table of its GAAP_USEFUL_LIVES defaults (DEFAULT_USEFUL_LIFE for unknown or missing types, as on the manual form).
+    type_codes, asset_types = pd.factorize(register["asset_type"])
+    own_lives = register["useful_life"].to_numpy(dtype=np.int64)
+    own_standards = register["gaap_standard"].to_numpy(dtype=object)
+    lives_by_book = np.empty((len(books), len(register)), dtype=np.int64)
+    for i, book in enumerate(books):
+        book_lives = GAAP_USEFUL_LIVES.get(book, {})
+        default_lives = np.array([book_lives.get(asset_type, DEFAULT_USEFUL_LIFE) for asset_type in asset_types] + [DEFAULT_USEFUL_LIFE], dtype=np.int64)
+        lives_by_book[i] = np.where(own_standards == book, own_lives, default_lives[type_codes])
+    return lives_by_book
+
+def multi_book_terms(costs, salvages, start_dates, lives_by_book, mode, provision_as_of_date, books, decimals=DEFAULT_DECIMALS, method_inputs=None):
+    # {book: AssetTerms} from a single asset_terms call over the stacked lives; start ordinals are shared by every book.
+    # Units-of-production lifetime units are capped per book at what that book's life can use.
+    if method_inputs is not None:
+        method_inputs = units_within_life(method_inputs, lives_by_book)
+    terms = asset_terms(costs, salvages, start_dates, lives_by_book, mode, provision_as_of_date, decimals, method_inputs)
+    return {book: AssetTerms(*(field if field.ndim == 1 else field[i] for field in terms)) for i, book in enumerate(books)}
+
+def book_difference_column(book, base_book):
+    return f"NBV {book} vs {base_book}"
+
+def multi_book_report(register, books, mode, provision_as_of_date, decimals=DEFAULT_DECIMALS, diagnostics=None):
+    # Per-asset side-by-side frame: life, accumulated depreciation and NBV in each book, then each later book's
+    # NBV minus the first book's. Differences are taken in minor units, so they are exact.
+    names, costs, salvages, starts, _ = register_arrays(register)
+    with timed(diagnostics, "multi_book_terms", rows=len(names), books=len(books)):
+        terms_by_book = multi_book_terms(costs, salvages, starts, book_useful_lives(register, books), mode, provision_as_of_date, books, decimals, register_method_inputs(register))
+    with timed(diagnostics, "multi_book_frame", rows=len(names)):
+        cost_units = to_minor_units(costs, decimals)
+        df_books = pd.DataFrame({"Asset": names, "Asset Type": register["asset_type"].to_numpy(), "Own Standard": register["gaap_standard"].to_numpy(), "Cost": to_major_units(cost_units, decimals)})
+        for book, terms in terms_by_book.items():
+            df_books[f"Life ({book})"] = terms.num_total_periods // 12 if mode == "Monthly" else terms.num_total_periods
+            df_books[f"Accumulated ({book})"] = to_major_units(terms.totals, decimals)
+            df_books[f"NBV ({book})"] = to_major_units(cost_units - terms.totals, decimals)
+        base_book = books[0]
+        for book in books[1:]:
+            df_books[book_difference_column(book, base_book)] = to_major_units(terms_by_book[base_book].totals - terms_by_book[book].totals, decimals)
+    return df_books
+
+def book_totals(df_books, books, decimals=DEFAULT_DECIMALS):
+    # One row per book: total accumulated depreciation and NBV, and the NBV difference to the first book (summed exactly).
+    rows = []
+    for book in books:
+        accumulated, nbv = (int(to_minor_units(df_books[f"{column} ({book})"], decimals).sum()) for column in ["Accumulated", "NBV"])
+        rows.append({"Book": book, "Accumulated Depreciation": accumulated, "Net Book Value": nbv})
+    df_totals = pd.DataFrame(rows)
+    df_totals[f"NBV vs {books[0]}"] = df_totals["Net Book Value"] - df_totals["Net Book Value"].iloc[0]
+    for column in ["Accumulated Depreciation", "Net Book Value", f"NBV vs {books[0]}"]:
+        df_totals[column] = to_major_units(df_totals[column].to_numpy(), decimals)
+    return df_totals
@@ -0,0 +1,131 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from .constants import DEFAULT_DECIMALS
+from .engine import AssetTerms, asset_terms
+from .methods import MethodInputs, straight_line_inputs
+from .snapshots import asset_input_hashes
+from .store import expand_entries
+
+DEFAULT_CACHE_ENTRIES = 5_000_000  # schedule entries (16 bytes each), about 80 MB
+MAX_SLICE_RUNS = 2_000  # above this many runs of unchanged assets, their periods are gathered in one vectorized pass
+
+@dataclass
+class CachedSchedule:
+    # One register's last result: terms and long-format entries in register order, plus its input hashes sorted for lookup.
+    sorted_hashes: np.ndarray  # uint64
+    sorted_rows: np.ndarray  # register row of each sorted hash
+    terms: AssetTerms
+    entry_starts: np.ndarray
+    entries: tuple  # (asset_ids, period_ordinals, amounts)
+
+    @property
+    def num_entries(self):
+        return len(self.entries[0])
+
+def within_offsets(counts):
+    # Position of each entry within its asset's run, for runs of the given lengths laid end to end.
+    return np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+
+def copy_hit_entries(cached, cached_rows, hit_rows, elapsed, entry_starts, period_ordinals, amounts):
+    # Copies hit assets' stored periods into place. Runs of consecutive rows that were also consecutive in the stored
+    # result (an edited register keeps most of its order) are contiguous in both, so they are copied as slices; a heavily
+    # reordered register falls back to one vectorized gather.
+    run_starts = hit_rows[np.r_[True, (np.diff(hit_rows) != 1) | (np.diff(cached_rows[hit_rows]) != 1)]]
+    if len(run_starts) > MAX_SLICE_RUNS:
+        counts = elapsed[hit_rows]
+        within = within_offsets(counts)
+        source = np.repeat(cached.entry_starts[cached_rows[hit_rows]], counts) + within
+        target = np.repeat(entry_starts[hit_rows], counts) + within
+        period_ordinals[target] = cached.entries[1][source]
+        amounts[target] = cached.entries[2][source]
+        return
+    run_ends = np.r_[hit_rows[np.searchsorted(hit_rows, run_starts[1:]) - 1], hit_rows[-1]]
+    for first, last in zip(run_starts.tolist(), run_ends.tolist()):
+        target = slice(entry_starts[first], entry_starts[last] + elapsed[last])
+        source_start = cached.entry_starts[cached_rows[first]]
+        source = slice(source_start, source_start + target.stop - target.start)
+        period_ordinals[target] = cached.entries[1][source]
+        amounts[target] = cached.entries[2][source]
+
+class ScheduleCache:
+    # Bounded LRU of whole-register results, one per (mode, provision date, currency decimals), held as numpy arrays.
+    # Assets are matched on a vectorized hash of their engine inputs (cost, salvage, start date, life, method and units),
+    # so an asset edited, added or moved in the register is still found by content. Hits take their terms and periods
+    # from the stored result; only misses go through the engine and expand_entries. The bound is on schedule entries.
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.results = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return sum(len(result.sorted_hashes) for result in self.results.values())
+
+    def stats(self):
+        return {"entries": sum(result.num_entries for result in self.results.values()), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def clear(self):
+        self.results.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def schedule(self, costs, salvages, start_dates, useful_lives, mode, provision_as_of_date, decimals=DEFAULT_DECIMALS, method_inputs=None):
+        # (terms, entries) for the register, as parallel_schedule returns them.
+        costs = np.asarray(costs, dtype=np.float64)
+        salvages = np.asarray(salvages, dtype=np.float64)
+        start_dates = np.asarray(start_dates, dtype="datetime64[D]")
+        useful_lives = np.asarray(useful_lives, dtype=np.int64)
+        method_inputs = method_inputs if method_inputs is not None else straight_line_inputs(len(costs))
+        hashes = asset_input_hashes(costs, salvages, start_dates, useful_lives, method_inputs)
+        context = (mode, provision_as_of_date.toordinal(), decimals)
+        cached = self.results.get(context)
+        cached_rows = np.full(len(hashes), -1, dtype=np.int64)
+        if cached is not None and len(cached.sorted_hashes):
+            positions = np.minimum(np.searchsorted(cached.sorted_hashes, hashes), len(cached.sorted_hashes) - 1)
+            found = cached.sorted_hashes[positions] == hashes
+            cached_rows[found] = cached.sorted_rows[positions[found]]
+        hit_rows, miss_rows = np.flatnonzero(cached_rows >= 0), np.flatnonzero(cached_rows < 0)
+        self.hits += len(hit_rows)
+        self.misses += len(miss_rows)
+        if cached is not None and len(miss_rows) == 0 and len(hit_rows) == len(cached.sorted_hashes) and np.array_equal(cached_rows, np.arange(len(hashes))):
+            # The same register again: the stored arrays are the result.
+            self.results.move_to_end(context)
+            return cached.terms, cached.entries
+
+        terms = AssetTerms(*(np.empty(len(hashes), dtype=np.int64) for _ in AssetTerms._fields))
+        if len(hit_rows):
+            for field, stored in zip(terms, cached.terms):
+                field[hit_rows] = stored[cached_rows[hit_rows]]
+        if len(miss_rows):
+            computed = asset_terms(costs[miss_rows], salvages[miss_rows], start_dates[miss_rows], useful_lives[miss_rows], mode, provision_as_of_date, decimals, MethodInputs(*(field[miss_rows] for field in method_inputs)))
+            for field, values in zip(terms, computed):
+                field[miss_rows] = values
+        entry_starts = np.cumsum(terms.elapsed) - terms.elapsed
+        asset_ids = np.repeat(np.arange(len(hashes), dtype=np.int32), terms.elapsed)
+        period_ordinals = np.empty(len(asset_ids), dtype=np.int32)
+        amounts = np.empty(len(asset_ids), dtype=np.int64)
+        if len(hit_rows):
+            copy_hit_entries(cached, cached_rows, hit_rows, terms.elapsed, entry_starts, period_ordinals, amounts)
+        if len(miss_rows):
+            _, miss_periods, miss_amounts = expand_entries(computed)
+            target = np.repeat(entry_starts[miss_rows], computed.elapsed) + within_offsets(computed.elapsed)
+            period_ordinals[target] = miss_periods
+            amounts[target] = miss_amounts
+        entries = (asset_ids, period_ordinals, amounts)
+        self.store(context, hashes, terms, entry_starts, entries)
+        return terms, entries
+
+    def store(self, context, hashes, terms, entry_starts, entries):
+        # Replaces the context's result, then evicts least recently used results until the entry bound holds.
+        # Stored arrays are read-only, as they are shared with the stores built from them.
+        self.results.pop(context, None)
+        if len(entries[0]) > self.max_entries:
+            return
+        for array in (*terms, entry_starts, *entries):
+            array.flags.writeable = False
+        order = np.argsort(hashes, kind="stable")
+        self.results[context] = CachedSchedule(hashes[order], order, terms, entry_starts, entries)
+        while sum(result.num_entries for result in self.results.values()) > self.max_entries:
+            self.results.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,85 @@
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+from .books import multi_book_report
+from .constants import CURRENCIES, CURRENCY_DECIMALS, GAAP_USEFUL_LIVES
+from .diagnostics import RunDiagnostics, configure_logging
+from .export import EXPORT_FORMATS, write_csv, write_parquet, write_reports, write_workbook
+from .parallel import default_workers
+from .register import load_asset_register
+from .snapshots import SnapshotStore
+from .reports import SCHEDULE_CHUNK_ROWS, build_reports, iter_schedule_frames, summary_reports
+
+CURRENCY_CODES = {label.split()[0]: label for label in CURRENCIES}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m depreciation_pro", description="Generate depreciation schedule, summary and NBV files for an asset register.")
+    parser.add_argument("register", type=Path, help="Asset register file (.csv, .xlsx, .xls or .parquet).")
+    parser.add_argument("--provision-date", type=date.fromisoformat, default=date.today(), help="Calculate depreciation up to this date (YYYY-MM-DD). Defaults to today.")
+    parser.add_argument("--mode", choices=["Monthly", "Yearly"], default="Monthly", help="Schedule mode (default: Monthly).")
+    parser.add_argument("--currency", choices=list(CURRENCY_CODES), default="USD", help="Currency of the register amounts; sets the minor unit amounts are rounded to (JPY: whole yen) (default: USD).")
+    parser.add_argument("--output-dir", type=Path, default=Path("."), help="Directory for the output files (created if missing).")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="CSV", help="CSV or Parquet write schedule, summary and NBV files; Excel writes one workbook with all three sheets (default: CSV).")
+    parser.add_argument("--summary-only", action="store_true", help="Skip the period-by-period schedule; write summary and NBV only.")
+    parser.add_argument("--books", choices=list(GAAP_USEFUL_LIVES), nargs="+", help="Also write a side-by-side NBV comparison of the register under these standards (computed in one pass), with differences against the first.")
+    parser.add_argument("--workers", type=int, default=1, help=f"Worker processes that expand the schedule, --chunk-rows assets per task (default: 1; this machine has {default_workers()} CPUs). Currently slower than one process unless that many cores are free and the register is large and Monthly on declining-balance, SYD or units methods: the pool and shared-memory copy cost about 20-30%% on a single core.")
+    parser.add_argument("--chunk-rows", type=int, default=SCHEDULE_CHUNK_ROWS, help=f"Assets per schedule chunk written to disk (default: {SCHEDULE_CHUNK_ROWS}).")
+    parser.add_argument("--snapshot-dir", type=Path, help="Roll forward from (and save) a snapshot of the last full schedule in this directory, so stored periods are copied and only new periods and changed assets are computed. Pays off most for declining-balance, SYD and units-of-production registers; ignored with --summary-only, which is faster computed directly.")
+    parser.add_argument("--diagnostics", action="store_true", help="Log wall time, row counts and memory for each stage to stderr.")
+    parser.add_argument("--profile", type=Path, help="Write a cProfile/pstats file for the whole run to this path.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.diagnostics:
+        configure_logging()
+    diagnostics = RunDiagnostics(mode=args.mode)
+    if args.profile is not None:
+        diagnostics.start_profile()
+    try:
+        with diagnostics.stage("load_register") as stage_record:
+            register = load_asset_register(args.register, args.register.name)
+            stage_record["rows"] = len(register)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"error: could not import register: {e}", file=sys.stderr)
+        return 1
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    stem = f"{args.mode.lower()}_dep_sched_{args.provision_date.strftime('%Y%m%d')}"
+    extension = EXPORT_FORMATS[args.format][0]
+    decimals = CURRENCY_DECIMALS[CURRENCY_CODES[args.currency]]
+    if args.snapshot_dir is not None and not args.summary_only:
+        # The rolled-forward store already holds the schedule, so it is written from memory rather than recomputed in chunks.
+        snapshots = SnapshotStore(args.snapshot_dir)
+        schedule_store, df_summary, df_nbv = build_reports(register, args.mode, args.provision_date, diagnostics=diagnostics, snapshots=snapshots, register_id=args.register.stem, decimals=decimals)
+        print(f"snapshot: {snapshots.last_run['reused']} assets rolled forward, {snapshots.last_run['recomputed']} recomputed, {snapshots.last_run['new_entries']} new periods", file=sys.stderr)
+        schedule_frames = schedule_store.iter_frames(args.chunk_rows)
+    else:
+        # The summary pass's terms feed the chunked writer, so the engine runs once and the chunks only expand periods.
+        terms, df_summary, df_nbv = summary_reports(register, args.mode, args.provision_date, diagnostics=diagnostics, decimals=decimals)
+        schedule_frames = [] if args.summary_only else iter_schedule_frames(register, args.mode, args.provision_date, args.chunk_rows, workers=args.workers, decimals=decimals, terms=terms)
+    with diagnostics.stage(f"export_{extension}", rows=len(register)):
+        if args.format == "Excel":
+            written = [args.output_dir / f"{stem}.{extension}"]
+            write_reports(schedule_frames, df_summary, df_nbv, args.format, written[0])
+        else:
+            write = write_parquet if args.format == "Parquet" else write_csv
+            outputs = ([] if args.summary_only else [("", schedule_frames)]) + [("_summary", [df_summary]), ("_nbv", [df_nbv])]
+            written = []
+            for suffix, frames in outputs:
+                written.append(args.output_dir / f"{stem}{suffix}.{extension}")
+                write(frames, written[-1])
+    if args.books:
+        df_books = multi_book_report(register, args.books, args.mode, args.provision_date, decimals, diagnostics)
+        written.append(args.output_dir / f"{stem}_books.{extension}")
+        with diagnostics.stage(f"export_books_{extension}", rows=len(df_books)):
+            if args.format == "Excel":
+                write_workbook({"Books": [df_books]}, written[-1])
+            else:
+                (write_parquet if args.format == "Parquet" else write_csv)([df_books], written[-1])
+    if args.profile is not None:
+        diagnostics.stop_profile(args.profile)
+    for path in written:
+        print(path)
+    return 0
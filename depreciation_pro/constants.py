@@ -0,0 +1,15 @@
+import datetime
+
+ASSET_TYPES = ["Building", "Vehicle", "Machinery", "Furniture", "Computer Equipment", "Office Equipment", "Leasehold Improvements", "Land Improvements", "Software", "Intangible Asset (e.g., Patent)"]
+GAAP_USEFUL_LIVES = {
+    "US GAAP": {"Building": 40, "Vehicle": 5, "Machinery": 10, "Furniture": 7, "Computer Equipment": 5, "Office Equipment": 7, "Leasehold Improvements": 15, "Land Improvements": 15, "Software": 3, "Intangible Asset (e.g., Patent)": 10},
+    "IFRS": {"Building": 30, "Vehicle": 7, "Machinery": 8, "Furniture": 5, "Computer Equipment": 4, "Office Equipment": 5, "Leasehold Improvements": 10, "Land Improvements": 10, "Software": 3, "Intangible Asset (e.g., Patent)": 10},
+    "Indian GAAP": {"Building": 60, "Vehicle": 8, "Machinery": 15, "Furniture": 10, "Computer Equipment": 3, "Office Equipment": 5, "Leasehold Improvements": 10, "Land Improvements": 10, "Software": 6, "Intangible Asset (e.g., Patent)": 10} 
+}
+MIN_CALENDAR_DATE = datetime.date(datetime.MINYEAR, 1, 1)
+MAX_CALENDAR_DATE = datetime.date(datetime.MAXYEAR, 12, 31)
+CURRENCIES = {"USD ($)": "$", "EUR (€)": "€", "GBP (£)": "£", "JPY (¥)": "¥", "INR (₹)": "₹"}
+CURRENCY_DECIMALS = {"USD ($)": 2, "EUR (€)": 2, "GBP (£)": 2, "JPY (¥)": 0, "INR (₹)": 2}  # ISO 4217 minor units
+DEFAULT_DECIMALS = 2
+DEFAULT_USEFUL_LIFE = 5
+MAX_USEFUL_LIFE = 100  # years; the longest GAAP default is 60
@@ -0,0 +1,103 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+# Per-stage wall time, output shape and process memory for one run. Every finished stage is also logged as a
+# key=value line on the "depreciation_pro" logger, so batch runs can be grepped and aggregated.
+logger = logging.getLogger("depreciation_pro")
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+def configure_logging(level=logging.INFO, stream=None):
+    # Attaches one stderr handler to the package logger; repeated calls (e.g. Streamlit reruns) are no-ops.
+    if not logger.handlers:
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+
+def current_rss_mb():
+    # Resident set size from /proc (Linux); None where unavailable.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+def frame_shape(df):
+    return {"rows": len(df), "columns": len(df.columns)}
+
+class RunDiagnostics:
+    def __init__(self, **context):
+        self.run_id = uuid.uuid4().hex[:8]
+        self.context = context
+        self.stages = []
+        self.profile = None
+
+    @contextmanager
+    def stage(self, name, **details):
+        # Yields the stage record so callers can add rows/columns (see frame_shape) once the output exists.
+        record = {"stage": name, **details}
+        rss_before = current_rss_mb()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - started
+            rss_after = current_rss_mb()
+            record["rss_mb"] = rss_after
+            record["rss_delta_mb"] = rss_after - rss_before if rss_after is not None and rss_before is not None else None
+            record["peak_rss_mb"] = peak_rss_mb()
+            self.stages.append(record)
+            logger.info(self.log_line(record))
+
+    def log_line(self, record):
+        fields = {"run": self.run_id, **self.context, **record}
+        return " ".join(f"{key}={value:.4f}" if isinstance(value, float) else f"{key}={value}" for key, value in fields.items() if value is not None)
+
+    @property
+    def total_seconds(self):
+        return sum(record["seconds"] for record in self.stages)
+
+    def frame(self):
+        columns = ["stage", "seconds", "rows", "columns", "rss_mb", "rss_delta_mb", "peak_rss_mb"]
+        df = pd.DataFrame(self.stages)
+        return df.reindex(columns=columns + [c for c in df.columns if c not in columns])
+
+    def start_profile(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop_profile(self, path):
+        # Writes a pstats file for the profiled span and returns its path; None if no profile was started.
+        if self.profile is None:
+            return None
+        self.profile.disable()
+        self.profile.dump_stats(path)
+        self.profile = None
+        logger.info(self.log_line({"profile": path}))
+        return path
+
+def timed(diagnostics, name, **details):
+    # diagnostics.stage(...) when a RunDiagnostics is given, otherwise a no-op context yielding a throwaway record.
+    return diagnostics.stage(name, **details) if diagnostics is not None else nullcontext({})
+
+def profile_summary(path, limit=25, sort="cumulative"):
+    stream = io.StringIO()
+    pstats.Stats(str(path), stream=stream).sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
@@ -0,0 +1,145 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from .constants import DEFAULT_DECIMALS
+from .methods import DECLINING_BALANCE, MethodInputs, cumulative_depreciation, declining_balance_switch_years, method_codes, period_amounts, straight_line_inputs
+from .periods import date_parts, days_in_month, period_labels, period_ordinal
+
+# ------------------ Depreciation Logic ------------------
+def generate_all_potential_periods(start_date, useful_life_years, mode):
+    # Ordinals of every period in the useful life, starting with the in-service period.
+    num_total_periods = max(useful_life_years * 12 if mode == "Monthly" else useful_life_years, 0)
+    start_ordinal = period_ordinal(start_date, mode)
+    return np.arange(start_ordinal, start_ordinal + num_total_periods, dtype=np.int64)
+
+def depreciation_row(asset_name, cost, salvage, start_date, useful_life_years, mode, provision_as_of_date, decimals=DEFAULT_DECIMALS, method="Straight-Line", total_units=0, annual_units=0):
+    # Single-asset view of the batch engine: period label -> amount up to the provision date, plus the final label.
+    all_potential_periods = generate_all_potential_periods(start_date, useful_life_years, mode)
+    if len(all_potential_periods) == 0:
+        return {"Asset": asset_name, "Total Depreciation": 0.00, "Original Cost": cost, "Original Salvage": salvage}, "N/A (No periods)"
+    terms = asset_terms([cost], [salvage], [start_date], [useful_life_years], mode, provision_as_of_date, decimals, MethodInputs(method_codes([method]), np.array([total_units], dtype=np.int64), np.array([annual_units], dtype=np.int64)))
+    included_periods = all_potential_periods[:terms.elapsed[0]]
+    matrix, _ = schedule_matrix(terms, included_periods, decimals)
+    actual_labels_for_schedule = period_labels(included_periods, mode)
+    row_data_for_schedule_df = dict(zip(actual_labels_for_schedule, matrix[0].tolist()))
+    row_data_for_schedule_df.update({"Asset": asset_name, "Total Depreciation": float(to_major_units(terms.totals[0], decimals)), "Original Cost": cost, "Original Salvage": salvage})
+    final_included_period_label = actual_labels_for_schedule[-1] if actual_labels_for_schedule else "N/A"
+    return row_data_for_schedule_df, final_included_period_label
+
+# ------------------ Batch Depreciation Engine ------------------
+# Same rules as depreciation_row, computed for a whole register at once, on integer period ordinals (see periods.py).
+def periods_elapsed(start_dates, useful_lives, mode, provision_as_of_date):
+    # Number of periods whose date (start + i months/years, day clamped to month end) is <= provision date.
+    lives = np.asarray(useful_lives, dtype=np.int64)
+    num_total_periods = lives * 12 if mode == "Monthly" else lives
+    start_years, start_months, start_days = date_parts(start_dates)
+    start_ordinals = start_years * 12 + start_months - 1 if mode == "Monthly" else start_years
+    provision_ordinal = period_ordinal(provision_as_of_date, mode)
+    if mode == "Monthly":
+        # In the provision month the period falls on min(start day, month length); month-end provision covers any day.
+        provision_is_month_end = provision_as_of_date.day == days_in_month(provision_as_of_date.year, provision_as_of_date.month)
+        same_period_included = provision_is_month_end | (start_days <= provision_as_of_date.day)
+    else:
+        # Feb 29 starts fall on Feb 28 in non-leap provision years.
+        feb_length = days_in_month(provision_as_of_date.year, 2)
+        clamped_days = np.where(start_months == 2, np.minimum(start_days, feb_length), start_days)
+        same_period_included = (start_months < provision_as_of_date.month) | ((start_months == provision_as_of_date.month) & (clamped_days <= provision_as_of_date.day))
+    elapsed = provision_ordinal - start_ordinals + same_period_included.astype(np.int64)
+    return np.clip(elapsed, 0, num_total_periods), start_ordinals, num_total_periods
+
+# Money is int64 minor units (cents, or whole yen for zero-decimal currencies): 10**decimals per major unit.
+# Amounts are converted once on the way in and once on the way out; everything in between is exact integer math.
+def to_minor_units(amounts, decimals=DEFAULT_DECIMALS):
+    return np.rint(np.asarray(amounts, dtype=np.float64) * 10 ** decimals).astype(np.int64)
+
+def to_major_units(minor_units, decimals=DEFAULT_DECIMALS):
+    return np.asarray(minor_units) / 10 ** decimals
+
+def divide_half_up(numerators, denominators):
+    # Integer division rounded to nearest with exact ties rounded up (commercial rounding), for non-negative numerators.
+    # The float round() this replaces settled ties by the binary representation of the quotient.
+    return (2 * numerators + denominators) // (2 * denominators)
+
+def straight_line_amounts(costs, salvages, useful_lives, mode, decimals=DEFAULT_DECIMALS):
+    # Per-period amount and last-period amount (which absorbs the rounding residual) per asset, in minor units.
+    depreciable_base = np.maximum(to_minor_units(costs, decimals) - to_minor_units(salvages, decimals), 0)
+    lives = np.asarray(useful_lives, dtype=np.int64)
+    num_total_periods = lives * 12 if mode == "Monthly" else lives
+    per_period = np.where(num_total_periods > 0, divide_half_up(depreciable_base, np.maximum(num_total_periods, 1)), 0)
+    last_period = per_period + np.where(depreciable_base > 0, depreciable_base - per_period * num_total_periods, 0)
+    return per_period, last_period
+
+class AssetTerms(NamedTuple):
+    # Per-asset int64 arrays that fully determine each asset's schedule up to the provision date; money fields are minor units.
+    # per_period/last_period drive straight-line assets; the fields after them are the inputs of the other
+    # methods' kernels (see methods.py) and are carried for every asset so terms concatenate and cache uniformly.
+    totals: np.ndarray
+    elapsed: np.ndarray
+    start_ordinals: np.ndarray
+    num_total_periods: np.ndarray
+    per_period: np.ndarray
+    last_period: np.ndarray
+    useful_lives: np.ndarray
+    methods: np.ndarray
+    cost_units: np.ndarray
+    salvage_units: np.ndarray
+    switch_years: np.ndarray
+    total_units: np.ndarray
+    annual_units: np.ndarray
+
+def asset_terms(costs, salvages, start_dates, useful_lives, mode, provision_as_of_date, decimals=DEFAULT_DECIMALS, method_inputs=None):
+    # method_inputs (a MethodInputs) picks each asset's depreciation method; None means straight-line throughout.
+    # Everything is elementwise, so useful_lives may also be a (books x assets) array: the calendar and depreciable base are
+    # still computed once per asset and broadcast, and the life-dependent fields come back with one row per book.
+    elapsed, start_ordinals, num_total_periods = periods_elapsed(start_dates, useful_lives, mode, provision_as_of_date)
+    per_period, last_period = straight_line_amounts(costs, salvages, useful_lives, mode, decimals)
+    lives = np.asarray(useful_lives, dtype=np.int64)
+    methods, total_units, annual_units = method_inputs if method_inputs is not None else straight_line_inputs(lives.shape[-1])
+    cost_units, salvage_units = to_minor_units(costs, decimals), to_minor_units(salvages, decimals)
+    switch_years = declining_balance_switch_years(cost_units, salvage_units, lives, methods == DECLINING_BALANCE)
+    terms = AssetTerms(None, elapsed, start_ordinals, num_total_periods, per_period, last_period, lives, methods, cost_units, salvage_units, switch_years, total_units, annual_units)
+    return terms._replace(totals=cumulative_depreciation(terms._replace(totals=per_period), elapsed))
+
+def depreciation_summary(costs, salvages, start_dates, useful_lives, mode, provision_as_of_date, decimals=DEFAULT_DECIMALS, method_inputs=None):
+    # Closed form, O(1) per asset: (accumulated depreciation, periods elapsed, start ordinals) without building any schedule.
+    terms = asset_terms(costs, salvages, start_dates, useful_lives, mode, provision_as_of_date, decimals, method_inputs)
+    return to_major_units(terms.totals, decimals), terms.elapsed, terms.start_ordinals
+
+def final_period_labels(start_dates, elapsed, start_ordinals, mode, provision_as_of_date):
+    has_periods = elapsed > 0
+    final_labels = np.empty(len(elapsed), dtype=object)
+    final_labels[has_periods] = period_labels((start_ordinals + elapsed - 1)[has_periods], mode)
+    starts_after = np.asarray(start_dates, dtype="datetime64[D]") > np.datetime64(provision_as_of_date, "D")
+    final_labels[~has_periods] = np.where(starts_after[~has_periods], "N/A (Starts after Provision Date)", "N/A")
+    return final_labels.tolist()
+
+def covered_period_ordinals(start_ordinals, elapsed):
+    # Sorted ordinals of every period at least one asset depreciates in (union of [start, start + elapsed)).
+    has_periods = elapsed > 0
+    if not has_periods.any():
+        return np.empty(0, dtype=np.int64)
+    first_ordinal = start_ordinals[has_periods].min()
+    span = (start_ordinals + elapsed)[has_periods].max() - first_ordinal
+    coverage = np.zeros(span + 1, dtype=np.int64)
+    np.add.at(coverage, start_ordinals[has_periods] - first_ordinal, 1)
+    np.add.at(coverage, (start_ordinals + elapsed)[has_periods] - first_ordinal, -1)
+    return np.flatnonzero(np.cumsum(coverage)[:-1] > 0) + first_ordinal
+
+def schedule_matrix(terms, period_ordinals=None, decimals=DEFAULT_DECIMALS):
+    # Assets x periods matrix in major units with NaN outside each asset's schedule.
+    # Pass period_ordinals to fix the columns (e.g. when building a register in chunks); by default only covered periods are kept.
+    if period_ordinals is None:
+        period_ordinals = covered_period_ordinals(terms.start_ordinals, terms.elapsed)
+    period_ordinals = np.asarray(period_ordinals, dtype=np.int64)
+    offset = period_ordinals[None, :] - terms.start_ordinals[:, None]
+    rows, columns = np.nonzero((offset >= 0) & (offset < terms.elapsed[:, None]))
+    matrix = np.full(offset.shape, np.nan)
+    matrix[rows, columns] = to_major_units(period_amounts(terms, rows, offset[rows, columns]), decimals)
+    return matrix, period_ordinals
+
+def depreciation_matrix(costs, salvages, start_dates, useful_lives, mode, provision_as_of_date, period_ordinals=None, decimals=DEFAULT_DECIMALS, method_inputs=None):
+    # Returns (matrix, period_ordinals, totals, elapsed) with matrix and totals in major units.
+    terms = asset_terms(costs, salvages, start_dates, useful_lives, mode, provision_as_of_date, decimals, method_inputs)
+    matrix, period_ordinals = schedule_matrix(terms, period_ordinals, decimals)
+    return matrix, period_ordinals, to_major_units(terms.totals, decimals), terms.elapsed
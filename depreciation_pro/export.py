@@ -0,0 +1,104 @@
+import importlib
+import io
+import os
+
+# Writers take iterables of DataFrame chunks (e.g. reports.iter_schedule_frames) so only one chunk is held at a time.
+# Values stay numeric; currency symbols are a display concern.
+EXPORT_FORMATS = {"CSV": ("csv", "text/csv"), "Parquet": ("parquet", "application/vnd.apache.parquet"), "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_MAX_COLUMNS = 16_384
+# Optional writer libraries per format: (module, error message when it is missing).
+EXPORT_REQUIREMENTS = {"Parquet": ("pyarrow.parquet", "Parquet export requires pyarrow (pip install pyarrow)."), "Excel": ("openpyxl", "Excel export requires openpyxl (pip install openpyxl).")}
+
+def iter_csv_chunks(frames):
+    for i, df_chunk in enumerate(frames):
+        yield df_chunk.to_csv(index=False, header=i == 0)
+
+def write_csv(frames, file):
+    # file is a path or a binary file object.
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "wb") as f:
+            return write_csv(frames, f)
+    for text in iter_csv_chunks(frames):
+        file.write(text.encode("utf-8"))
+
+def write_parquet(frames, file):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(EXPORT_REQUIREMENTS["Parquet"][1]) from e
+    writer = None
+    try:
+        for df_chunk in frames:
+            table = pa.Table.from_pandas(df_chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(file, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+def excel_columns_error(sheet_name, num_columns):
+    return f"Sheet '{sheet_name}' has {num_columns:,} columns; Excel allows {EXCEL_MAX_COLUMNS:,}. Use CSV or Parquet, or Yearly mode."
+
+def excel_rows_error(sheet_name):
+    return f"Sheet '{sheet_name}' exceeds Excel's {EXCEL_MAX_ROWS:,} row limit. Use CSV or Parquet."
+
+def write_workbook(sheets, file):
+    # sheets maps sheet name -> iterable of frames; rows are appended through openpyxl's write-only mode.
+    try:
+        from openpyxl import Workbook
+    except ImportError as e:
+        raise ImportError(EXPORT_REQUIREMENTS["Excel"][1]) from e
+    workbook = Workbook(write_only=True)
+    try:
+        for sheet_name, frames in sheets.items():
+            worksheet, rows_written = workbook.create_sheet(title=sheet_name), 0
+            for i, df_chunk in enumerate(frames):
+                if i == 0:
+                    if len(df_chunk.columns) > EXCEL_MAX_COLUMNS:
+                        raise ValueError(excel_columns_error(sheet_name, len(df_chunk.columns)))
+                    worksheet.append([str(c) for c in df_chunk.columns])
+                    rows_written = 1
+                rows_written += len(df_chunk)
+                if rows_written > EXCEL_MAX_ROWS:
+                    raise ValueError(excel_rows_error(sheet_name))
+                for row in df_chunk.astype(object).where(df_chunk.notna(), None).itertuples(index=False, name=None):
+                    worksheet.append(row)
+    except Exception:
+        # Finish the sheets written so far, which closes the temporary files openpyxl streams their rows to.
+        for worksheet in workbook.worksheets:
+            worksheet.close()
+        raise
+    workbook.save(file)
+
+def write_reports(schedule_frames, df_summary, df_nbv, export_format, file):
+    # Single-file export for one format: CSV/Parquet hold the schedule, Excel holds schedule, summary and NBV sheets.
+    if export_format == "Excel":
+        write_workbook({"Schedule": schedule_frames, "Summary": [df_summary], "NBV": [df_nbv]}, file)
+    elif export_format == "Parquet":
+        write_parquet(schedule_frames, file)
+    else:
+        write_csv(schedule_frames, file)
+
+def check_export(export_format, num_rows, num_columns):
+    # Raises, before anything is written, the errors write_reports would otherwise raise part-way through: a missing
+    # writer library, or a schedule (num_rows assets, num_columns columns) beyond Excel's sheet limits.
+    if export_format in EXPORT_REQUIREMENTS:
+        module, message = EXPORT_REQUIREMENTS[export_format]
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            raise ImportError(message) from e
+    if export_format == "Excel":
+        if num_columns > EXCEL_MAX_COLUMNS:
+            raise ValueError(excel_columns_error("Schedule", num_columns))
+        if num_rows + 1 > EXCEL_MAX_ROWS:
+            raise ValueError(excel_rows_error("Schedule"))
+
+def export_bytes(schedule_frames, df_summary, df_nbv, export_format):
+    # The whole export file as bytes, for a download that is handed over in one piece (e.g. a deferred download button).
+    buffer = io.BytesIO()
+    write_reports(schedule_frames, df_summary, df_nbv, export_format, buffer)
+    return buffer.getvalue()
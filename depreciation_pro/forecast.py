@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .constants import DEFAULT_DECIMALS
+from .diagnostics import timed
+from .engine import AssetTerms, asset_terms, to_major_units, to_minor_units
+from .methods import KERNEL_BLOCK_ENTRIES, cumulative_depreciation
+from .periods import date_parts
+from .reports import register_arrays, register_method_inputs
+
+# NBV forecasts: accumulated depreciation and NBV of every asset at a series of future month-ends, in one pass.
+# Terms are computed once; each (asset, date) pair then only needs the periods elapsed by that date, and the method
+# kernels give cumulative depreciation after any number of periods directly (the running sum of the period amounts),
+# so no per-period schedule is expanded and nothing is recomputed per date.
+FORECAST_STEPS = {"Month-End": 1, "Quarter-End": 3, "Year-End": 12}
+DEFAULT_FORECAST_STEP = "Month-End"
+FORECAST_MEASURES = ["Net Book Value", "Accumulated Depreciation"]
+
+def forecast_dates(start_date, end_date, step=DEFAULT_FORECAST_STEP):
+    # Month-ends in [start_date, end_date] whose month closes the step: every month, Mar/Jun/Sep/Dec, or Dec.
+    step_months = FORECAST_STEPS[step]
+    months = np.arange(np.datetime64(start_date, "M"), np.datetime64(end_date, "M") + 1)
+    months = months[(months.astype(np.int64) % 12 + 1) % step_months == 0]
+    month_ends = (months + 1).astype("datetime64[D]") - 1
+    return month_ends[month_ends <= np.datetime64(end_date, "D")]
+
+def elapsed_at_month_ends(terms, start_months, month_ends, mode):
+    # (assets x dates) periods elapsed, as periods_elapsed would give with each month-end as the provision date. At a
+    # month-end every start day is covered, so the in-service period counts in Monthly mode, and in Yearly mode it
+    # counts once the start month is reached.
+    years, months, _ = date_parts(month_ends)
+    if mode == "Monthly":
+        elapsed = (years * 12 + months - 1)[None, :] - terms.start_ordinals[:, None] + 1
+    else:
+        elapsed = years[None, :] - terms.start_ordinals[:, None] + (start_months[:, None] <= months[None, :])
+    return np.clip(elapsed, 0, terms.num_total_periods[:, None])
+
+@dataclass
+class NBVForecast:
+    dates: np.ndarray  # datetime64[D] month-ends
+    names: list
+    cost_units: np.ndarray  # (assets,) minor units
+    accumulated: np.ndarray  # (assets x dates) minor units
+    opening: np.ndarray  # (assets,) accumulated at the step before the first date, minor units
+    decimals: int = DEFAULT_DECIMALS
+
+    def totals(self):
+        # Register-wide frame, one row per date; money is summed exactly in minor units.
+        accumulated = self.accumulated.sum(axis=0)
+        charges = np.diff(np.concatenate(([self.opening.sum()], accumulated)))
+        return pd.DataFrame({
+            "Date": pd.to_datetime(self.dates),
+            "Cost": to_major_units(np.full(len(self.dates), self.cost_units.sum()), self.decimals),
+            "Depreciation in Step": to_major_units(charges, self.decimals),
+            "Accumulated Depreciation": to_major_units(accumulated, self.decimals),
+            "Net Book Value": to_major_units(self.cost_units.sum() - accumulated, self.decimals),
+        })
+
+    def asset_frame(self, measure="Net Book Value"):
+        # Per-asset wide frame: Asset, Cost, then one column per date (YYYY-MM-DD) of the measure.
+        values = self.cost_units[:, None] - self.accumulated if measure == "Net Book Value" else self.accumulated
+        df_assets = pd.DataFrame(to_major_units(values, self.decimals), columns=np.datetime_as_string(self.dates, unit="D"))
+        df_assets.insert(0, "Cost", to_major_units(self.cost_units, self.decimals))
+        df_assets.insert(0, "Asset", self.names)
+        return df_assets
+
+def forecast_accumulated(terms, start_months, month_ends, mode):
+    # cumulative_depreciation over (assets x dates), with each asset's terms broadcast across the dates. Assets are
+    # taken in blocks so the broadcast kernel inputs stay near KERNEL_BLOCK_ENTRIES entries.
+    accumulated = np.empty((len(terms.start_ordinals), len(month_ends)), dtype=np.int64)
+    block_rows = max(KERNEL_BLOCK_ENTRIES // max(len(month_ends), 1), 1)
+    for block in range(0, len(accumulated), block_rows):
+        rows = slice(block, block + block_rows)
+        block_terms = AssetTerms(*(field[rows] for field in terms))
+        elapsed = elapsed_at_month_ends(block_terms, start_months[rows], month_ends, mode)
+        accumulated[rows] = cumulative_depreciation(AssetTerms(*(field[:, None] for field in block_terms)), elapsed)
+    return accumulated
+
+def nbv_forecast(register, mode, start_date, end_date, step=DEFAULT_FORECAST_STEP, decimals=DEFAULT_DECIMALS, diagnostics=None):
+    # NBVForecast of the register at every step month-end from start_date to end_date.
+    names, costs, salvages, starts, lives = register_arrays(register)
+    month_ends = forecast_dates(start_date, end_date, step)
+    # The step before the first date gives the opening balance for the first step's charge.
+    previous_end = (np.datetime64(month_ends[0] if len(month_ends) else end_date, "M") - FORECAST_STEPS[step] + 1).astype("datetime64[D]") - 1
+    with timed(diagnostics, "forecast_terms", rows=len(names)):
+        terms = asset_terms(costs, salvages, starts, lives, mode, end_date, decimals, register_method_inputs(register))
+    with timed(diagnostics, "forecast_accumulated", rows=len(names), dates=len(month_ends)):
+        accumulated = forecast_accumulated(terms, date_parts(starts)[1], np.concatenate(([previous_end], month_ends)), mode)
+    return NBVForecast(month_ends, names, to_minor_units(costs, decimals), accumulated[:, 1:], accumulated[:, 0], decimals)
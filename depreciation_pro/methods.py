@@ -0,0 +1,180 @@
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+# Depreciation methods as batch kernels. Each kernel maps (terms, periods) to cumulative depreciation in minor units
+# after `periods` periods of each asset's life, for whole arrays of assets at once; per-period amounts are differences
+# of consecutive cumulative values. Every method shares the straight-line rules around the kernel: nothing before the
+# in-service period, the provision date cuts off elapsed periods, accumulated depreciation never exceeds cost less
+# salvage (the salvage floor), and the last period of the useful life takes whatever is left (the residual).
+# Declining balance, SYD and units of production are annual methods; in Monthly mode each year's amount is spread
+# evenly over its months.
+
+KERNEL_BLOCK_ENTRIES = 1 << 20
+
+class MethodInputs(NamedTuple):
+    # Per-asset method codes (see DEPRECIATION_METHODS) and units-of-production figures, as int64 arrays.
+    methods: np.ndarray
+    total_units: np.ndarray
+    annual_units: np.ndarray
+
+class DepreciationMethod(NamedTuple):
+    code: int
+    cumulative: Callable
+
+def straight_line_cumulative(terms, periods):
+    # Equal rounded amounts; the last period absorbs the rounding residual.
+    reached_last = (periods >= terms.num_total_periods) & (terms.num_total_periods > 0)
+    return terms.per_period * np.minimum(periods, terms.num_total_periods) + np.where(reached_last, terms.last_period - terms.per_period, 0)
+
+def depreciable_bases(terms):
+    return np.maximum(terms.cost_units - terms.salvage_units, 0)
+
+def life_position(terms, periods):
+    # (periods per year, whole years elapsed, fraction of the current year elapsed).
+    periods_per_year = np.where(terms.useful_lives > 0, terms.num_total_periods // np.maximum(terms.useful_lives, 1), 1)
+    return periods_per_year, periods // periods_per_year, (periods % periods_per_year) / periods_per_year
+
+def sum_of_years_digits_cumulative(terms, periods):
+    # Year y (1-based) takes (L - y + 1) / (L (L + 1) / 2) of the depreciable base.
+    lives = terms.useful_lives
+    _, years, year_fraction = life_position(terms, periods)
+    digits_used = years * lives - years * (years - 1) / 2 + year_fraction * (lives - years)
+    return np.rint(depreciable_bases(terms) * digits_used / np.maximum(lives * (lives + 1) / 2, 1))
+
+def declining_balance_cumulative(terms, periods):
+    # Double declining balance: 2/L of the opening book value each year until switch_years, then straight-line on the
+    # remaining book value down to salvage. Cumulative amounts are evaluated at the surrounding year boundaries.
+    _, years, year_fraction = life_position(terms, periods)
+    bases = depreciable_bases(terms)
+    lives = np.maximum(terms.useful_lives, 1)
+    retained = 1 - 2 / lives
+    switch_from = terms.switch_years - 1
+    at_switch = np.minimum(terms.cost_units * (1 - retained ** switch_from), bases)
+    straight_charge = (bases - at_switch) / np.maximum(lives - switch_from, 1)
+    decayed = retained ** years
+    opening = np.where(years <= switch_from, np.minimum(terms.cost_units * (1 - decayed), bases), at_switch + (years - switch_from) * straight_charge)
+    closing = np.where(years + 1 <= switch_from, np.minimum(terms.cost_units * (1 - decayed * retained), bases), at_switch + (years + 1 - switch_from) * straight_charge)
+    return np.rint(opening + (closing - opening) * year_fraction)
+
+def units_of_production_cumulative(terms, periods):
+    # annual_units of total_units are used each year until none are left; depreciation follows the share of units used.
+    # Registers and the form require annual_units x life >= total_units, and other books' lives go through
+    # units_within_life, so the residual never carries unused units.
+    _, years, year_fraction = life_position(terms, periods)
+    capacity = np.maximum(terms.total_units, 1)
+    opening_units = np.minimum(years * terms.annual_units, capacity)
+    units_used = opening_units + (np.minimum((years + 1) * terms.annual_units, capacity) - opening_units) * year_fraction
+    return np.rint(depreciable_bases(terms) * units_used / capacity)
+
+# Labels as shown in the asset form and written to summaries; codes are what AssetTerms and snapshots store.
+DEPRECIATION_METHODS = {
+    "Straight-Line": DepreciationMethod(0, straight_line_cumulative),
+    "Double-Declining Balance": DepreciationMethod(1, declining_balance_cumulative),
+    "Sum-of-Years' Digits": DepreciationMethod(2, sum_of_years_digits_cumulative),
+    "Units of Production": DepreciationMethod(3, units_of_production_cumulative),
+}
+DEFAULT_METHOD = "Straight-Line"
+STRAIGHT_LINE = DEPRECIATION_METHODS[DEFAULT_METHOD].code
+DECLINING_BALANCE = DEPRECIATION_METHODS["Double-Declining Balance"].code
+UNITS_OF_PRODUCTION = DEPRECIATION_METHODS["Units of Production"].code
+METHOD_LABELS = {method.code: label for label, method in DEPRECIATION_METHODS.items()}
+# Register spellings, matched after lower-casing and dropping everything but letters.
+METHOD_ALIASES = {
+    **{"".join(filter(str.isalpha, label.lower())): label for label in DEPRECIATION_METHODS},
+    "sl": "Straight-Line", "straight": "Straight-Line",
+    "ddb": "Double-Declining Balance", "decliningbalance": "Double-Declining Balance", "doubledeclining": "Double-Declining Balance",
+    "syd": "Sum-of-Years' Digits", "sumofyears": "Sum-of-Years' Digits",
+    "uop": "Units of Production", "unitsofproduction": "Units of Production", "units": "Units of Production",
+}
+
+def method_codes(labels):
+    return np.array([DEPRECIATION_METHODS[label].code for label in labels], dtype=np.int64)
+
+def method_inputs(labels, total_units=None, annual_units=None):
+    # MethodInputs from method labels and optional units columns (0 where missing).
+    codes = method_codes(labels)
+    units = [np.zeros(len(codes), dtype=np.int64) if values is None else np.nan_to_num(np.asarray(values, dtype=np.float64)).astype(np.int64) for values in (total_units, annual_units)]
+    return MethodInputs(codes, *units)
+
+def units_within_life(method_inputs, useful_lives):
+    # MethodInputs with units-of-production total_units capped at annual_units x useful_life, which may be a
+    # (books x assets) array. Under a shorter life than the register's (another book's) the asset can only use that many
+    # units; uncapped, the units it never reaches would all be charged in its last period.
+    lives = np.asarray(useful_lives, dtype=np.int64)
+    capped = np.where(method_inputs.methods == UNITS_OF_PRODUCTION, np.minimum(method_inputs.total_units, method_inputs.annual_units * lives), method_inputs.total_units)
+    return method_inputs._replace(total_units=capped)
+
+def straight_line_inputs(num_assets):
+    return MethodInputs(*(np.zeros(num_assets, dtype=np.int64) for _ in MethodInputs._fields))
+
+def declining_balance_switch_years(cost_units, salvage_units, useful_lives, is_declining):
+    # First year (1-based) in which straight-line on the remaining book value is at least the declining-balance charge,
+    # or L + 1 if that never happens. Loops over years of life (not assets), vectorized over the declining-balance assets.
+    cost_units, salvage_units, useful_lives, is_declining = np.broadcast_arrays(cost_units, salvage_units, useful_lives, is_declining)
+    switch_years = useful_lives + 1
+    rows = np.flatnonzero(is_declining.ravel())
+    if len(rows) == 0:
+        return switch_years
+    costs, salvages, lives = (a.ravel()[rows].astype(np.float64) for a in (cost_units, salvage_units, useful_lives))
+    found_years = lives + 1
+    book_values = costs.copy()
+    pending = np.ones(len(rows), dtype=bool)
+    for year in range(1, int(lives.max()) + 1):
+        pending &= year <= lives
+        if not pending.any():
+            break
+        declining_charge = book_values * 2 / lives
+        straight_charge = (book_values - salvages) / np.maximum(lives - year + 1, 1)
+        switching = pending & (straight_charge >= declining_charge)
+        found_years[switching] = year
+        pending &= ~switching
+        book_values = np.maximum(book_values - declining_charge, salvages)
+    switch_years = switch_years.copy()
+    switch_years.ravel()[rows] = found_years.astype(np.int64)
+    return switch_years
+
+def cumulative_depreciation(terms, periods):
+    # Cumulative minor-unit depreciation after `periods` periods, element-wise over terms fields (which may be
+    # gathered per entry). Non-straight-line kernels are clipped to the salvage floor and end on the residual.
+    if not np.any(terms.methods != STRAIGHT_LINE):
+        return straight_line_cumulative(terms, periods)
+    fields = [field.ravel() for field in np.broadcast_arrays(*terms, periods)]
+    shape = np.broadcast_shapes(*(np.shape(field) for field in terms), np.shape(periods))
+    cumulative = np.empty(fields[0].size, dtype=np.int64)
+    flat_methods = fields[terms._fields.index("methods")]
+    for method in DEPRECIATION_METHODS.values():
+        rows = np.flatnonzero(flat_methods == method.code)
+        if len(rows) == 0:
+            continue
+        # Gather only when methods are mixed; a single-method block is used as is.
+        rows = slice(None) if len(rows) == len(cumulative) else rows
+        method_terms = type(terms)(*(field[rows] for field in fields[:-1]))
+        method_periods = fields[-1][rows]
+        values = method.cumulative(method_terms, method_periods)
+        if method.code != STRAIGHT_LINE:
+            bases = depreciable_bases(method_terms)
+            values = np.where(method_periods >= method_terms.num_total_periods, bases, np.clip(values, 0, bases))
+        cumulative[rows] = values
+    return cumulative.reshape(shape)
+
+def period_amounts(terms, asset_ids, offsets):
+    # Minor-unit amount of the period `offsets` (0-based from the in-service period) for each (asset_ids, offsets) entry.
+    amounts = terms.per_period[asset_ids]
+    is_last = offsets == terms.num_total_periods[asset_ids] - 1
+    amounts[is_last] = terms.last_period[asset_ids[is_last]]
+    other_method = np.flatnonzero(terms.methods[asset_ids] != STRAIGHT_LINE)
+    # Kernels need terms fields per entry, so entries are gathered in blocks to bound memory on large schedules.
+    for block in range(0, len(other_method), KERNEL_BLOCK_ENTRIES):
+        entries = other_method[block:block + KERNEL_BLOCK_ENTRIES]
+        entry_ids, entry_offsets = asset_ids[entries], offsets[entries]
+        entry_terms = type(terms)(*(field[entry_ids] for field in terms))
+        closing = cumulative_depreciation(entry_terms, entry_offsets + 1)
+        # Where an entry continues its asset's previous entry, its opening balance is that entry's closing balance;
+        # the kernels only run again for the first entry of each run.
+        opening = np.empty_like(closing)
+        opening[1:] = closing[:-1]
+        run_starts = np.flatnonzero(np.concatenate(([True], (entry_ids[1:] != entry_ids[:-1]) | (entry_offsets[1:] != entry_offsets[:-1] + 1))))
+        opening[run_starts] = cumulative_depreciation(type(terms)(*(field[run_starts] for field in entry_terms)), entry_offsets[run_starts])
+        amounts[entries] = closing - opening
+    return amounts
@@ -0,0 +1,64 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .constants import DEFAULT_DECIMALS
+from .engine import AssetTerms, asset_terms
+from .store import expand_entries
+
+# The engine runs once in the parent (terms are O(1) per asset); only the period expansion, which is O(periods), is
+# sharded. Shards are contiguous row ranges, so each shard's periods occupy a known slice of the register's entry arrays:
+# workers write them straight into shared memory and return nothing, so the only data pickled is each shard's terms.
+# Results are identical to a single-process run regardless of worker count or shard size.
+#
+# The pool start and the copy out of shared memory are fixed costs a single process does not pay. Measured on one CPU
+# (200k assets, Monthly) two workers take 1.2-1.3x the single-process time; a speedup needs at least that many free cores and
+# registers whose expansion dominates, i.e. large Monthly registers on declining-balance, SYD or units methods.
+DEFAULT_SHARD_ROWS = 20_000
+
+def default_workers():
+    return os.cpu_count() or 1
+
+def shared_array(memory, dtype, length):
+    return np.ndarray(length, dtype=dtype, buffer=memory.buf)
+
+def expand_into_shared(task):
+    # Worker side: expands one shard's periods into its slice of the shared period and amount arrays.
+    terms, first_entry, num_entries, ordinals_name, amounts_name = task
+    ordinals_memory, amounts_memory = SharedMemory(name=ordinals_name), SharedMemory(name=amounts_name)
+    try:
+        _, period_ordinals, amounts = expand_entries(terms)
+        rows = slice(first_entry, first_entry + len(amounts))
+        shared_array(ordinals_memory, np.int32, num_entries)[rows] = period_ordinals
+        shared_array(amounts_memory, np.int64, num_entries)[rows] = amounts
+    finally:
+        ordinals_memory.close()
+        amounts_memory.close()
+
+def parallel_entries(terms, executor, shard_rows=DEFAULT_SHARD_ROWS):
+    # expand_entries(terms) with the expansion split into shards of shard_rows assets across the executor's processes.
+    num_assets, num_entries = len(terms.elapsed), int(terms.elapsed.sum())
+    entry_starts = np.cumsum(terms.elapsed) - terms.elapsed
+    ordinals_memory = SharedMemory(create=True, size=max(num_entries * 4, 1))
+    amounts_memory = SharedMemory(create=True, size=max(num_entries * 8, 1))
+    try:
+        tasks = [(AssetTerms(*(field[offset:offset + shard_rows] for field in terms)), int(entry_starts[offset]), num_entries, ordinals_memory.name, amounts_memory.name) for offset in range(0, num_assets, shard_rows)]
+        list(executor.map(expand_into_shared, tasks))
+        period_ordinals = shared_array(ordinals_memory, np.int32, num_entries).copy()
+        amounts = shared_array(amounts_memory, np.int64, num_entries).copy()
+    finally:
+        for memory in (ordinals_memory, amounts_memory):
+            memory.close()
+            memory.unlink()
+    return np.repeat(np.arange(num_assets, dtype=np.int32), terms.elapsed), period_ordinals, amounts
+
+def parallel_schedule(costs, salvages, start_dates, useful_lives, mode, provision_as_of_date, include_periods=True, workers=None, shard_rows=DEFAULT_SHARD_ROWS, decimals=DEFAULT_DECIMALS, method_inputs=None):
+    # (AssetTerms, entries) for a whole register, with the period expansion spread across a process pool.
+    workers = default_workers() if workers is None else workers
+    terms = asset_terms(costs, salvages, start_dates, useful_lives, mode, provision_as_of_date, decimals, method_inputs)
+    if workers <= 1 or not include_periods or len(costs) <= shard_rows:
+        return terms, expand_entries(terms, include_periods)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return terms, parallel_entries(terms, executor, shard_rows)
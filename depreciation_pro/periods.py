@@ -0,0 +1,49 @@
+import calendar
+from functools import lru_cache
+
+import numpy as np
+
+# Periods are integer ordinals: year * 12 + month - 1 when Monthly, the year when Yearly.
+# Labels are formatted once per distinct period from a shared table and never parsed back; order comes from the ordinals.
+MONTH_ABBREVIATIONS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+def period_ordinal(d, mode):
+    return d.year * 12 + d.month - 1 if mode == "Monthly" else d.year
+
+def period_label(ordinal, mode):
+    if mode == "Monthly":
+        return f"{MONTH_ABBREVIATIONS[ordinal % 12]} {ordinal // 12}"
+    return str(ordinal)
+
+@lru_cache(maxsize=32)
+def label_table(first_ordinal, last_ordinal, mode):
+    return tuple(period_label(o, mode) for o in range(first_ordinal, last_ordinal + 1))
+
+def period_labels(ordinals, mode):
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    if ordinals.size == 0:
+        return []
+    first_ordinal = int(ordinals.min())
+    table = label_table(first_ordinal, int(ordinals.max()), mode)
+    return [table[i] for i in (ordinals - first_ordinal).tolist()]
+
+def ordinal_years(ordinals, mode):
+    return ordinals // 12 if mode == "Monthly" else ordinals
+
+def year_window(first_year, last_year, mode):
+    # Inclusive (first, last) ordinals covering calendar years first_year..last_year.
+    return (first_year * 12, last_year * 12 + 11) if mode == "Monthly" else (first_year, last_year)
+
+def days_in_month(year, month):
+    return calendar.monthrange(year, month)[1]
+
+def date_parts(dates):
+    # Vectorized (year, month, day) from a sequence of dates or a datetime64 array.
+    days = np.asarray(dates, dtype="datetime64[D]")
+    months = days.astype("datetime64[M]")
+    years = days.astype("datetime64[Y]").astype(np.int64) + 1970
+    return years, months.astype(np.int64) % 12 + 1, (days - months).astype(np.int64) + 1
+
+def date_ordinals(dates, mode):
+    years, months, _ = date_parts(dates)
+    return years * 12 + months - 1 if mode == "Monthly" else years
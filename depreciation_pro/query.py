@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from .engine import to_major_units, to_minor_units
+from .periods import period_ordinal
+
+# Depreciation-between-periods queries over a computed ScheduleStore. Entries are grouped by asset and each asset's
+# periods are consecutive from its start ordinal, so the entry holding any period sits at a fixed offset from the
+# asset's first entry. One cumulative sum over all entries then answers "depreciation in periods A..B" per asset with
+# two lookups and a subtraction, independent of how many periods lie between A and B.
+UNSPECIFIED_GROUP = "Unspecified"
+GROUP_COLUMNS = {"gaap_standard": "GAAP Standard", "asset_type": "Asset Type"}
+
+class ScheduleIndex:
+    def __init__(self, schedule_store):
+        self.store = schedule_store
+        self.prefix = np.concatenate(([0], np.cumsum(schedule_store.amounts, dtype=np.int64)))
+        self.entry_starts = np.cumsum(schedule_store.elapsed) - schedule_store.elapsed
+
+    def entry_positions(self, ordinal):
+        # Index into prefix of the first entry after `ordinal` for every asset (clamped to the asset's entries).
+        return self.entry_starts + np.clip(ordinal + 1 - self.store.start_ordinals, 0, self.store.elapsed)
+
+    def between(self, first_ordinal=None, last_ordinal=None):
+        # Minor-unit depreciation per asset over the inclusive ordinal range (open ends when None).
+        lo = self.entry_starts if first_ordinal is None else self.entry_positions(first_ordinal - 1)
+        hi = self.entry_starts + self.store.elapsed if last_ordinal is None else self.entry_positions(last_ordinal)
+        return self.prefix[np.maximum(hi, lo)] - self.prefix[lo]
+
+    def accumulated_at(self, last_ordinal):
+        return self.between(None, last_ordinal)
+
+    def between_dates(self, start_date, end_date):
+        # Periods are whole months or years: each date selects the period it falls in. Nothing past the store's
+        # provision date is available, so later end dates are effectively cut at it.
+        return self.between(period_ordinal(start_date, self.store.mode), period_ordinal(end_date, self.store.mode))
+
+    def range_report(self, start_date, end_date, groups=None):
+        # Per-asset frame: cost, depreciation in the range, accumulated depreciation and NBV at the range end.
+        decimals = self.store.decimals
+        last_ordinal = period_ordinal(end_date, self.store.mode)
+        cost_units = to_minor_units(self.store.costs, decimals)
+        accumulated = self.accumulated_at(last_ordinal)
+        df_range = pd.DataFrame({"Asset": self.store.names})
+        if groups is not None:
+            for column in groups.columns:
+                df_range[column] = groups[column].to_numpy()
+        df_range["Cost"] = to_major_units(cost_units, decimals)
+        df_range["Depreciation in Range"] = to_major_units(self.between_dates(start_date, end_date), decimals)
+        df_range["Accumulated Depreciation"] = to_major_units(accumulated, decimals)
+        df_range["Net Book Value"] = to_major_units(cost_units - accumulated, decimals)
+        return df_range
+
+def register_groups(register):
+    # Group-by labels (GAAP Standard, Asset Type) for each register row; missing values fall into UNSPECIFIED_GROUP.
+    return pd.DataFrame({label: register[column].astype(object).where(register[column].notna(), UNSPECIFIED_GROUP).to_numpy() for column, label in GROUP_COLUMNS.items()})
+
+def rollup(df_range, by, decimals):
+    # Sums of a range_report frame per group, with money summed exactly in minor units.
+    amount_columns = ["Cost", "Depreciation in Range", "Accumulated Depreciation", "Net Book Value"]
+    minor = pd.DataFrame({c: to_minor_units(df_range[c], decimals) for c in amount_columns})
+    for column in by:
+        minor[column] = df_range[column].to_numpy()
+    df_rollup = minor.groupby(by, sort=True).agg(Assets=("Cost", "size"), **{c: (c, "sum") for c in amount_columns}).reset_index()
+    for c in amount_columns:
+        df_rollup[c] = to_major_units(df_rollup[c].to_numpy(), decimals)
+    return df_rollup
@@ -0,0 +1,131 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from .constants import ASSET_TYPES, GAAP_USEFUL_LIVES, DEFAULT_USEFUL_LIFE, MAX_USEFUL_LIFE
+from .methods import DEFAULT_METHOD, METHOD_ALIASES
+
+REGISTER_COLUMNS = ["name", "cost", "salvage", "start_date", "gaap_standard", "asset_type", "useful_life", "method", "total_units", "annual_units"]
+REQUIRED_REGISTER_COLUMNS = ["name", "cost", "start_date"]
+REGISTER_COLUMN_ALIASES = {
+    "asset": "name", "asset_name": "name",
+    "salvage_value": "salvage",
+    "in_service_date": "start_date", "in-service_date": "start_date", "date_in_service": "start_date",
+    "gaap": "gaap_standard", "standard": "gaap_standard",
+    "type": "asset_type", "category": "asset_type",
+    "life": "useful_life", "useful_life_years": "useful_life", "life_override": "useful_life",
+    "depreciation_method": "method",
+    "lifetime_units": "total_units", "units_total": "total_units", "capacity_units": "total_units",
+    "units_per_year": "annual_units", "yearly_units": "annual_units",
+}
+REGISTER_FILE_TYPES = ["csv", "xlsx", "xls", "parquet"]
+REGISTER_CHUNK_ROWS = 50_000
+ASSET_TYPE_KEYS = {asset_type.lower(): asset_type for asset_type in ASSET_TYPES}
+
+def read_register_chunks(file, filename, chunk_rows=REGISTER_CHUNK_ROWS):
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        yield from pd.read_csv(file, chunksize=chunk_rows, dtype=str, keep_default_na=False, na_values=[""])
+    elif extension == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(file).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    elif extension in ("xlsx", "xls"):
+        # Excel readers load the whole sheet; split afterwards so validation stays chunked.
+        sheet = pd.read_excel(file)
+        for offset in range(0, max(len(sheet), 1), chunk_rows):
+            yield sheet.iloc[offset:offset + chunk_rows]
+    else:
+        raise ValueError(f"Unsupported register file type '.{extension}'. Use one of: {', '.join(REGISTER_FILE_TYPES)}.")
+
+def normalize_register_columns(chunk):
+    renamed = {c: REGISTER_COLUMN_ALIASES.get(k, k) for c in chunk.columns for k in [str(c).strip().lower().replace(" ", "_")]}
+    chunk = chunk.rename(columns=renamed)
+    missing = [c for c in REQUIRED_REGISTER_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Register is missing required column(s): {', '.join('in_service_date' if c == 'start_date' else c for c in missing)}.")
+    return chunk.reindex(columns=REGISTER_COLUMNS)
+
+def register_date_format(start_dates):
+    # strftime format of the first text date, used for every chunk so a date like 05/02/2020 reads the same wherever it
+    # appears; "ISO8601" when it cannot be guessed, None while no text dates have been seen (real datetimes need none).
+    text_dates = start_dates[start_dates.map(lambda value: isinstance(value, str) and value.strip() != "")]
+    if text_dates.empty:
+        return None
+    with warnings.catch_warnings():
+        # pandas warns when the guess is day-first; reading the file's own format is the point here.
+        warnings.simplefilter("ignore", UserWarning)
+        return guess_datetime_format(text_dates.iloc[0].strip()) or "ISO8601"
+
+def validate_register_chunk(chunk, first_row_number, date_format=None):
+    chunk = normalize_register_columns(chunk)
+    row_numbers = np.arange(first_row_number, first_row_number + len(chunk))
+    cleaned = pd.DataFrame(index=chunk.index)
+    cleaned["name"] = chunk["name"].astype("string").str.strip()
+    cleaned["cost"] = pd.to_numeric(chunk["cost"], errors="coerce").astype(np.float64)
+    cleaned["salvage"] = pd.to_numeric(chunk["salvage"], errors="coerce").astype(np.float64).fillna(0.0)
+    start_dates = chunk["start_date"].map(lambda value: value.strip() if isinstance(value, str) else value)
+    cleaned["start_date"] = pd.to_datetime(start_dates, errors="coerce", format=date_format).dt.normalize()
+    cleaned["gaap_standard"] = chunk["gaap_standard"].astype("string").str.strip().fillna("US GAAP")
+    asset_types = chunk["asset_type"].astype("string").str.strip()
+    cleaned["asset_type"] = asset_types.str.lower().map(ASSET_TYPE_KEYS).fillna(asset_types)
+    cleaned["useful_life"] = pd.to_numeric(chunk["useful_life"], errors="coerce")
+    method_keys = chunk["method"].astype("string").str.lower().str.replace(r"[^a-z]", "", regex=True)
+    cleaned["method"] = method_keys.map(METHOD_ALIASES).astype(object).where(method_keys.notna() & (method_keys != ""), DEFAULT_METHOD)
+    cleaned["total_units"] = pd.to_numeric(chunk["total_units"], errors="coerce")
+    cleaned["annual_units"] = pd.to_numeric(chunk["annual_units"], errors="coerce")
+    units_of_production = cleaned["method"] == "Units of Production"
+    lives = cleaned["useful_life"].fillna(pd.Series(default_useful_lives(cleaned), index=cleaned.index))
+    problems = {
+        "missing name": cleaned["name"].isna() | (cleaned["name"] == ""),
+        "invalid or negative cost": cleaned["cost"].isna() | (cleaned["cost"] < 0),
+        "negative salvage": cleaned["salvage"] < 0,
+        f"invalid in-service date{f' (expected the format {date_format} of the first date in the file)' if date_format else ''}": cleaned["start_date"].isna(),
+        "unknown GAAP standard": ~cleaned["gaap_standard"].isin(list(GAAP_USEFUL_LIVES.keys())),
+        f"useful life must be a whole number from 1 to {MAX_USEFUL_LIFE}": cleaned["useful_life"].notna() & ((cleaned["useful_life"] < 1) | (cleaned["useful_life"] > MAX_USEFUL_LIFE) | (cleaned["useful_life"] % 1 != 0)),
+        # A blank life defaults from the asset type; a missing or misspelt type would silently get DEFAULT_USEFUL_LIFE.
+        f"blank useful life needs an asset type from: {', '.join(ASSET_TYPES)}": cleaned["useful_life"].isna() & ~cleaned["asset_type"].isin(ASSET_TYPES),
+        "unknown depreciation method": cleaned["method"].isna(),
+        "units of production needs total_units >= 1 and annual_units >= 0": units_of_production & ((cleaned["total_units"].fillna(0) < 1) | cleaned["annual_units"].isna() | (cleaned["annual_units"] < 0)),
+        "units must be whole numbers": (cleaned["total_units"] % 1 > 0) | (cleaned["annual_units"] % 1 > 0),
+        # Units left unused at the end of the life would all be charged in the last period.
+        "units of production needs annual_units x useful_life >= total_units": units_of_production & (cleaned["annual_units"].fillna(0) * lives < cleaned["total_units"].fillna(0)),
+    }
+    errors = [f"{problem} (rows {', '.join(map(str, row_numbers[mask.to_numpy()][:5]))}{', ...' if mask.sum() > 5 else ''})" for problem, mask in problems.items() if mask.any()]
+    if errors:
+        raise ValueError("Invalid register rows: " + "; ".join(errors) + ".")
+    return cleaned
+
+def default_useful_lives(register):
+    # GAAP_USEFUL_LIVES default per row by (standard, asset type), falling back like the manual form does.
+    defaults = pd.Series({(standard, asset_type): life for standard, lives in GAAP_USEFUL_LIVES.items() for asset_type, life in lives.items()}, dtype="float64")
+    lookup_keys = pd.MultiIndex.from_arrays([register["gaap_standard"].astype(object), register["asset_type"].astype(object)])
+    return defaults.reindex(lookup_keys).fillna(DEFAULT_USEFUL_LIFE).to_numpy()
+
+def apply_default_useful_lives(register):
+    # Missing lives default from GAAP_USEFUL_LIVES (see default_useful_lives).
+    default_lives = default_useful_lives(register)
+    register["useful_life"] = register["useful_life"].fillna(pd.Series(default_lives, index=register.index)).astype(np.int64)
+    return register
+
+def load_asset_register(file, filename, chunk_rows=REGISTER_CHUNK_ROWS):
+    # Reads, validates and normalizes an asset register file into the same columns the manual form produces.
+    chunks, first_row_number, date_format = [], 2, None  # Row 1 is the header.
+    for chunk in read_register_chunks(file, filename, chunk_rows):
+        date_format = date_format or register_date_format(normalize_register_columns(chunk)["start_date"])
+        chunks.append(validate_register_chunk(chunk, first_row_number, date_format))
+        first_row_number += len(chunk)
+    if not chunks or sum(len(c) for c in chunks) == 0:
+        raise ValueError("Register file contains no asset rows.")
+    register = pd.concat(chunks, ignore_index=True)
+    register["salvage"] = np.minimum(register["salvage"].to_numpy(), register["cost"].to_numpy())
+    register["name"] = register["name"].astype(object)
+    register[["total_units", "annual_units"]] = register[["total_units", "annual_units"]].fillna(0).astype(np.int64)
+    return apply_default_useful_lives(register)
+
+def asset_register_from_inputs(asset_input_data_list):
+    register = pd.DataFrame(asset_input_data_list, columns=REGISTER_COLUMNS)
+    register["start_date"] = np.asarray(register["start_date"].tolist(), dtype="datetime64[D]")
+    return register
@@ -0,0 +1,100 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+from .constants import DEFAULT_DECIMALS
+from .diagnostics import timed
+from .engine import AssetTerms, asset_terms, to_major_units, to_minor_units, covered_period_ordinals, final_period_labels
+from .methods import METHOD_LABELS, method_inputs
+from .parallel import DEFAULT_SHARD_ROWS, parallel_entries, parallel_schedule
+from .store import build_schedule_store, expand_entries
+
+SCHEDULE_CHUNK_ROWS = 5_000
+
+def register_arrays(register):
+    # (names, costs, salvages, start dates, lives) as the engine expects them.
+    return (
+        register["name"].tolist(),
+        register["cost"].to_numpy(dtype=np.float64),
+        register["salvage"].to_numpy(dtype=np.float64),
+        register["start_date"].to_numpy().astype("datetime64[D]"),
+        register["useful_life"].to_numpy(dtype=np.int64),
+    )
+
+def register_method_inputs(register):
+    # MethodInputs for the register's method / units columns; None (straight-line throughout) for registers without them.
+    if "method" not in register:
+        return None
+    return method_inputs(register["method"].tolist(), register["total_units"].to_numpy(), register["annual_units"].to_numpy())
+
+def build_reports(register, mode, provision_as_of_date, summary_only=False, cache=None, workers=1, shard_rows=DEFAULT_SHARD_ROWS, diagnostics=None, snapshots=None, register_id=None, decimals=DEFAULT_DECIMALS):
+    # (schedule store, summary, NBV); summary_only keeps only per-asset totals in the store.
+    # Amounts are computed in minor units of a currency with the given decimals (0 for JPY) and reported in currency units.
+    # workers > 1 shards the register across a process pool. cache (a ScheduleCache) serves unchanged assets' terms and
+    # periods from the previous run; it is only consulted single-process and for full schedules, as terms alone are cheap.
+    # diagnostics (a RunDiagnostics) records the engine, store and summary-frame stages separately.
+    # snapshots (a SnapshotStore) rolls the register identified by register_id forward from its last saved run; summary-only
+    # runs skip it, as their terms cost no more to compute than to roll forward, before the snapshot load and save.
+    names, costs, salvages, starts, lives = register_arrays(register)
+    methods = register_method_inputs(register)
+    with timed(diagnostics, "asset_terms", rows=len(names), workers=workers):
+        if snapshots is not None and not summary_only:
+            terms, entries = snapshots.asset_terms(register_id, names, costs, salvages, starts, lives, mode, provision_as_of_date, include_periods=not summary_only, decimals=decimals, method_inputs=methods)
+        elif workers > 1:
+            terms, entries = parallel_schedule(costs, salvages, starts, lives, mode, provision_as_of_date, not summary_only, workers, shard_rows, decimals, methods)
+        elif cache is not None and not summary_only:
+            terms, entries = cache.schedule(costs, salvages, starts, lives, mode, provision_as_of_date, decimals, methods)
+        else:
+            terms, entries = asset_terms(costs, salvages, starts, lives, mode, provision_as_of_date, decimals, methods), None
+    with timed(diagnostics, "schedule_store") as record:
+        schedule_store = build_schedule_store(terms, names, costs, salvages, mode, include_periods=not summary_only, entries=entries, decimals=decimals)
+        record["rows"] = len(schedule_store.amounts)
+    with timed(diagnostics, "summary_frames", rows=len(names)):
+        df_summary, df_nbv = report_frames(terms, names, costs, starts, lives, mode, provision_as_of_date, decimals)
+    return schedule_store, df_summary, df_nbv
+
+def summary_reports(register, mode, provision_as_of_date, diagnostics=None, decimals=DEFAULT_DECIMALS):
+    # (AssetTerms, summary, NBV) without expanding any periods. The terms can be handed to iter_schedule_frames, so a
+    # chunked schedule export after the summary does not run the engine again.
+    names, costs, salvages, starts, lives = register_arrays(register)
+    methods = register_method_inputs(register)
+    with timed(diagnostics, "asset_terms", rows=len(names)):
+        terms = asset_terms(costs, salvages, starts, lives, mode, provision_as_of_date, decimals, methods)
+    with timed(diagnostics, "summary_frames", rows=len(names)):
+        df_summary, df_nbv = report_frames(terms, names, costs, starts, lives, mode, provision_as_of_date, decimals)
+    return terms, df_summary, df_nbv
+
+def report_frames(terms, names, costs, starts, lives, mode, provision_as_of_date, decimals=DEFAULT_DECIMALS):
+    # (summary, NBV) frames for a register's AssetTerms.
+    accumulated = to_major_units(terms.totals, decimals)
+    cost_units = to_minor_units(costs, decimals)
+    df_summary = pd.DataFrame({"Asset": names, "Method": pd.Series(terms.methods).map(METHOD_LABELS).to_numpy(), "Useful Life (Years)": lives, "Accumulated Depreciation": accumulated, "Final Included Period": final_period_labels(starts, terms.elapsed, terms.start_ordinals, mode, provision_as_of_date)})
+    df_nbv = pd.DataFrame({"Asset": names, "Cost": to_major_units(cost_units, decimals), "Accumulated Depreciation": accumulated, "Net Book Value": to_major_units(cost_units - terms.totals, decimals)})
+    return df_summary, df_nbv
+
+def grand_totals(df, columns, decimals=DEFAULT_DECIMALS):
+    # Column totals of a report frame, summed exactly as integers in minor units.
+    return {c: int(to_minor_units(df[c], decimals).sum()) / 10 ** decimals for c in columns}
+
+def iter_schedule_frames(register, mode, provision_as_of_date, chunk_rows=SCHEDULE_CHUNK_ROWS, workers=1, decimals=DEFAULT_DECIMALS, terms=None):
+    # Schedule frames of at most chunk_rows assets, all sharing the register-wide period columns.
+    # Each chunk gets its own small store, so peak memory follows chunk_rows (times workers) rather than the register size;
+    # with workers > 1 each group of `workers` chunks is expanded in a process pool (see parallel.py), in register order.
+    # The engine runs once for the whole register, or not at all when terms (e.g. from summary_reports) are given.
+    names, costs, salvages, starts, lives = register_arrays(register)
+    if terms is None:
+        terms = asset_terms(costs, salvages, starts, lives, mode, provision_as_of_date, decimals, register_method_inputs(register))
+    period_ordinals = covered_period_ordinals(terms.start_ordinals, terms.elapsed)
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as executor:
+        group_rows = chunk_rows * max(workers, 1)
+        for group_offset in range(0, len(names), group_rows):
+            group_terms = AssetTerms(*(field[group_offset:group_offset + group_rows] for field in terms))
+            asset_ids, group_periods, group_amounts = parallel_entries(group_terms, executor, chunk_rows) if executor is not None else expand_entries(group_terms)
+            entry_starts = np.r_[0, np.cumsum(group_terms.elapsed)]
+            for offset in range(0, len(group_terms.elapsed), chunk_rows):
+                rows, entries = slice(group_offset + offset, group_offset + offset + chunk_rows), slice(entry_starts[offset], entry_starts[min(offset + chunk_rows, len(group_terms.elapsed))])
+                chunk = AssetTerms(*(field[offset:offset + chunk_rows] for field in group_terms))
+                chunk_store = build_schedule_store(chunk, names[rows], costs[rows], salvages[rows], mode, entries=(asset_ids[entries] - np.int32(offset), group_periods[entries], group_amounts[entries]), decimals=decimals)
+                yield chunk_store.pivot(period_ordinals=period_ordinals)
@@ -0,0 +1,218 @@
+import hashlib
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .constants import DEFAULT_DECIMALS
+from .engine import AssetTerms, asset_terms, periods_elapsed
+from .methods import MethodInputs, cumulative_depreciation, straight_line_inputs
+from .store import expand_entries
+
+# Roll-forward snapshots: per register and mode, the last run's per-asset terms and accumulated balances
+# (<id>.<mode>.assets.arrow) and its period ordinals and amounts in asset order (<id>.<mode>.entries.arrow; asset ids
+# follow from the elapsed counts), as uncompressed Arrow IPC files that are memory-mapped on load. Assets are matched by name (and occurrence, for repeated names); an asset whose
+# inputs hash the same as in the snapshot keeps its stored terms, balance and entries, and only the periods between
+# the snapshot's provision date and the new one are expanded. Changed and new assets go through the engine in full.
+# Money is stored in the minor units of the run's currency; a snapshot taken with other currency decimals is not reused.
+# Both files of a save carry the same run token: entries from another save (a concurrent writer sharing the register
+# id) or of the wrong length are ignored, and the reused assets' periods are expanded again instead.
+# A roll-forward still evaluates every asset's balance (the kernels cost the same per asset whatever its age) and
+# rewrites the snapshot; what it saves is expanding stored periods, which pays off for full schedules of
+# declining-balance, SYD and units-of-production assets. An unchanged register skips per-asset hashing via its digest.
+SNAPSHOT_VERSION = "5"
+DEFAULT_SNAPSHOT_DIR = ".depreciation_snapshots"
+ASSET_COLUMNS = ["asset_key", "input_hash", *AssetTerms._fields]
+
+def require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Roll-forward snapshots require pyarrow (pip install pyarrow).") from e
+    return pa
+
+def register_fingerprints(names, costs, salvages, start_dates, useful_lives, method_inputs):
+    # (asset_keys, input_hashes) as uint64: identity from the name (plus occurrence when names repeat), content from the engine inputs.
+    name_hashes = pd.util.hash_array(np.asarray(names, dtype=object))
+    asset_keys = pd.Series(name_hashes)
+    if not pd.Index(name_hashes).is_unique:
+        occurrence = asset_keys.groupby(name_hashes, sort=False).cumcount()
+        asset_keys = pd.util.hash_pandas_object(pd.DataFrame({"name": name_hashes, "occurrence": occurrence}), index=False)
+    return asset_keys.to_numpy(), asset_input_hashes(costs, salvages, start_dates, useful_lives, method_inputs)
+
+def register_digest(names, costs, salvages, start_dates, useful_lives, method_inputs):
+    # One digest of the names and engine inputs of the whole register, far cheaper than per-asset hashing. A register
+    # identical to its snapshot's (the usual month-end close) takes the stored fingerprints instead of hashing again.
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\x1f".join(map(str, names)).encode())
+    for array in (np.asarray(costs, dtype=np.float64), np.asarray(salvages, dtype=np.float64), np.asarray(start_dates, dtype="datetime64[D]").astype(np.int64), np.asarray(useful_lives, dtype=np.int64), *(np.asarray(field, dtype=np.int64) for field in method_inputs)):
+        digest.update(np.ascontiguousarray(array).data)
+    return digest.hexdigest()
+
+def asset_input_hashes(costs, salvages, start_dates, useful_lives, method_inputs):
+    # uint64 hash per asset of everything the engine reads, vectorized over the register.
+    inputs = pd.DataFrame({"cost": costs, "salvage": salvages, "start_date": np.asarray(start_dates, dtype="datetime64[D]").astype(np.int64), "useful_life": useful_lives, **method_inputs._asdict()})
+    return pd.util.hash_pandas_object(inputs, index=False).to_numpy()
+
+@dataclass
+class Snapshot:
+    provision_as_of_date: date
+    asset_keys: np.ndarray
+    input_hashes: np.ndarray
+    terms: AssetTerms
+    entries: tuple = None  # (period_ordinals, amounts) in asset order, or None for a summary-only snapshot
+    register_digest: str = None
+    run_token: str = None
+
+class SnapshotStore:
+    # Directory of roll-forward snapshots. last_run describes the most recent asset_terms call, like ScheduleCache's counters.
+    def __init__(self, directory=DEFAULT_SNAPSHOT_DIR):
+        self.directory = Path(directory)
+        self.last_run = {}
+
+    def paths(self, register_id, mode):
+        stem = re.sub(r"[^A-Za-z0-9._-]+", "_", str(register_id)) + f".{mode.lower()}"
+        return self.directory / f"{stem}.assets.arrow", self.directory / f"{stem}.entries.arrow"
+
+    def load(self, register_id, mode, decimals=DEFAULT_DECIMALS):
+        # Zero-copy numpy views over memory-mapped files; None if there is no readable snapshot for this register and mode.
+        pa = require_pyarrow()
+        assets_path, entries_path = self.paths(register_id, mode)
+        if not assets_path.exists():
+            return None
+        try:
+            assets = pa.ipc.open_file(pa.memory_map(str(assets_path))).read_all()
+            metadata = assets.schema.metadata or {}
+            if metadata.get(b"version") != SNAPSHOT_VERSION.encode() or metadata.get(b"decimals") != str(decimals).encode():
+                return None
+            columns = {name: assets.column(name).to_numpy() for name in ASSET_COLUMNS}
+            entries = None
+            if metadata.get(b"has_entries") == b"1" and entries_path.exists():
+                table = pa.ipc.open_file(pa.memory_map(str(entries_path))).read_all()
+                if (table.schema.metadata or {}).get(b"run_token") == metadata.get(b"run_token") and table.num_rows == int(columns["elapsed"].sum()):
+                    entries = tuple(table.column(name).to_numpy() for name in ["period_ordinal", "amount"])
+        except (OSError, KeyError, pa.ArrowInvalid):
+            return None
+        return Snapshot(date.fromisoformat(metadata[b"provision_as_of_date"].decode()), columns["asset_key"], columns["input_hash"], AssetTerms(*(columns[f] for f in AssetTerms._fields)), entries, metadata.get(b"register_digest", b"").decode() or None, metadata.get(b"run_token", b"").decode())
+
+    def save(self, register_id, mode, provision_as_of_date, asset_keys, input_hashes, terms, entries=None, decimals=DEFAULT_DECIMALS, digest=None, entries_token=None):
+        # Written to temporary files and renamed into place, so a reader never sees a half-written snapshot.
+        # entries_token keeps the entries file already on disk (written with that token) when the entries are unchanged.
+        pa = require_pyarrow()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        assets_path, entries_path = self.paths(register_id, mode)
+        run_token = entries_token or uuid.uuid4().hex
+        metadata = {"version": SNAPSHOT_VERSION, "mode": mode, "provision_as_of_date": provision_as_of_date.isoformat(), "decimals": str(decimals), "has_entries": "1" if entries is not None else "0", "run_token": run_token, "register_digest": digest or ""}
+        if entries is not None and entries_token is None:
+            write_arrow(pa, pa.table({"period_ordinal": entries[1], "amount": entries[2]}).replace_schema_metadata({"run_token": run_token}), entries_path)
+        elif entries is None and entries_path.exists():
+            entries_path.unlink()
+        assets = pa.table({"asset_key": asset_keys, "input_hash": input_hashes, **terms._asdict()})
+        write_arrow(pa, assets.replace_schema_metadata(metadata), assets_path)
+
+    def asset_terms(self, register_id, names, costs, salvages, start_dates, useful_lives, mode, provision_as_of_date, include_periods=True, decimals=DEFAULT_DECIMALS, method_inputs=None):
+        # (terms, entries) for the register, rolled forward from its snapshot where possible; saves the new snapshot.
+        method_inputs = method_inputs if method_inputs is not None else straight_line_inputs(len(names))
+        digest = register_digest(names, costs, salvages, start_dates, useful_lives, method_inputs)
+        snapshot = self.load(register_id, mode, decimals)
+        if snapshot is not None and snapshot.register_digest == digest:
+            asset_keys, input_hashes = snapshot.asset_keys, snapshot.input_hashes
+        else:
+            asset_keys, input_hashes = register_fingerprints(names, costs, salvages, start_dates, useful_lives, method_inputs)
+        if snapshot is not None and snapshot.provision_as_of_date > provision_as_of_date:
+            # Looking back before the snapshot: compute in full and keep the later snapshot.
+            terms = asset_terms(costs, salvages, start_dates, useful_lives, mode, provision_as_of_date, decimals, method_inputs)
+            self.last_run = {"snapshot_date": snapshot.provision_as_of_date, "reused": 0, "recomputed": len(names), "new_entries": int(terms.elapsed.sum()) if include_periods else 0, "saved": False}
+            return terms, expand_entries(terms, include_periods) if include_periods else None
+        terms, entries, stats = roll_forward(snapshot, asset_keys, input_hashes, costs, salvages, start_dates, useful_lives, mode, provision_as_of_date, include_periods, decimals, method_inputs)
+        entries_token = snapshot.run_token if stats.pop("entries_unchanged") else None
+        self.save(register_id, mode, provision_as_of_date, asset_keys, input_hashes, terms, entries, decimals, digest, entries_token)
+        self.last_run = {"snapshot_date": snapshot.provision_as_of_date if snapshot is not None else None, **stats, "saved": True}
+        return terms, entries
+
+def write_arrow(pa, table, path):
+    # A temporary name of its own per write, so concurrent writers never share one.
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+def roll_forward(snapshot, asset_keys, input_hashes, costs, salvages, start_dates, useful_lives, mode, provision_as_of_date, include_periods=True, decimals=DEFAULT_DECIMALS, method_inputs=None):
+    # (terms, entries or None, stats). Reused assets keep their stored per-period amounts and add only new periods
+    # to their stored balance; everything else is computed by the engine.
+    num_assets = len(asset_keys)
+    snapshot_rows = np.full(num_assets, -1, dtype=np.int64)
+    if snapshot is not None and np.array_equal(snapshot.asset_keys, asset_keys):
+        snapshot_rows = np.arange(num_assets, dtype=np.int64)
+    elif snapshot is not None:
+        snapshot_index = pd.Index(snapshot.asset_keys)
+        if snapshot_index.is_unique:
+            snapshot_rows = snapshot_index.get_indexer(asset_keys)
+    matched = snapshot_rows >= 0
+    reused = matched.copy()
+    if matched.any():
+        reused[matched] = snapshot.input_hashes[snapshot_rows[matched]] == input_hashes[matched]
+    reused_rows, fresh_rows = np.flatnonzero(reused), np.flatnonzero(~reused)
+
+    terms = AssetTerms(*(np.zeros(num_assets, dtype=np.int64) for _ in AssetTerms._fields))
+    previous_elapsed = np.zeros(num_assets, dtype=np.int64)
+    if len(fresh_rows):
+        fresh_methods = MethodInputs(*(field[fresh_rows] for field in method_inputs)) if method_inputs is not None else None
+        fresh = asset_terms(costs[fresh_rows], salvages[fresh_rows], np.asarray(start_dates)[fresh_rows], useful_lives[fresh_rows], mode, provision_as_of_date, decimals, fresh_methods)
+        for field, values in zip(terms, fresh):
+            field[fresh_rows] = values
+    if len(reused_rows):
+        stored = AssetTerms(*(field[snapshot_rows[reused_rows]] for field in snapshot.terms))
+        elapsed, _, _ = periods_elapsed(np.asarray(start_dates)[reused_rows], useful_lives[reused_rows], mode, provision_as_of_date)
+        added = cumulative_depreciation(stored, elapsed) - cumulative_depreciation(stored, stored.elapsed)
+        rolled = stored._replace(totals=stored.totals + added, elapsed=elapsed)
+        for field, values in zip(terms, rolled):
+            field[reused_rows] = values
+        previous_elapsed[reused_rows] = stored.elapsed
+    stats = {"reused": len(reused_rows), "recomputed": len(fresh_rows)}
+    if not include_periods:
+        return terms, None, {**stats, "new_entries": 0, "entries_unchanged": False}
+
+    # Periods already in the snapshot are copied over; the rest (new periods, changed assets) are expanded.
+    has_stored_entries = snapshot is not None and snapshot.entries is not None
+    first_offsets = previous_elapsed if has_stored_entries else np.zeros(num_assets, dtype=np.int64)
+    new_ids, new_periods, new_amounts = expand_entries(terms, first_offsets=first_offsets)
+    entry_starts = np.cumsum(terms.elapsed) - terms.elapsed
+    num_entries = int(terms.elapsed.sum())
+    asset_ids = np.repeat(np.arange(num_assets, dtype=np.int32), terms.elapsed)
+    period_ordinals = np.empty(num_entries, dtype=np.int32)
+    amounts = np.empty(num_entries, dtype=np.int64)
+    new_offsets = np.arange(len(new_ids), dtype=np.int64) - np.repeat(np.cumsum(terms.elapsed - first_offsets) - (terms.elapsed - first_offsets), terms.elapsed - first_offsets)
+    new_positions = entry_starts[new_ids] + first_offsets[new_ids] + new_offsets
+    period_ordinals[new_positions] = new_periods
+    amounts[new_positions] = new_amounts
+    in_stored_order = has_stored_entries and len(reused_rows) == num_assets and np.array_equal(snapshot_rows, np.arange(num_assets))
+    if in_stored_order and len(new_ids) == 0:
+        # Nothing new (e.g. a Yearly register a month on): the stored entries are the result. They are copied rather than
+        # kept as views of the memory-mapped file, which a later save replaces.
+        period_ordinals, amounts = snapshot.entries[0].copy(), snapshot.entries[1].copy()
+    elif in_stored_order:
+        # Every asset reused in stored order: the stored entries keep their order, so fill the non-new slots in one copy.
+        stored = np.ones(num_entries, dtype=bool)
+        stored[new_positions] = False
+        period_ordinals[stored] = snapshot.entries[0]
+        amounts[stored] = snapshot.entries[1]
+    elif has_stored_entries and len(reused_rows):
+        counts = previous_elapsed[reused_rows]
+        stored_starts = (np.cumsum(snapshot.terms.elapsed) - snapshot.terms.elapsed)[snapshot_rows[reused_rows]]
+        within = np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+        source = np.repeat(stored_starts, counts) + within
+        target = np.repeat(entry_starts[reused_rows], counts) + within
+        period_ordinals[target] = snapshot.entries[0][source]
+        amounts[target] = snapshot.entries[1][source]
+    return terms, (asset_ids, period_ordinals, amounts), {**stats, "new_entries": len(new_ids), "entries_unchanged": in_stored_order and len(new_ids) == 0}
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .constants import DEFAULT_DECIMALS
+from .engine import covered_period_ordinals, to_major_units
+from .methods import period_amounts
+from .periods import ordinal_years, period_labels
+
+@dataclass
+class ScheduleStore:
+    # Canonical long-format schedule: one entry per (asset, period) that actually depreciates, sorted by asset then period.
+    # Memory follows the number of depreciating periods rather than assets x calendar span; wide frames are only
+    # materialized by pivot() for a window of periods and/or a slice of assets. Money is held as int64 minor units
+    # (10**decimals per currency unit) and converted to floats only in the frames pivot() returns.
+    mode: str
+    names: list
+    costs: np.ndarray
+    salvages: np.ndarray
+    totals: np.ndarray  # int64 minor units
+    start_ordinals: np.ndarray
+    elapsed: np.ndarray
+    asset_ids: np.ndarray  # int32
+    period_ordinals: np.ndarray  # int32
+    amounts: np.ndarray  # int64 minor units
+    decimals: int = DEFAULT_DECIMALS
+
+    @property
+    def num_assets(self):
+        return len(self.names)
+
+    @property
+    def total_depreciation(self):
+        # Register-wide accumulated depreciation in currency units, from an exact integer sum.
+        return int(self.totals.sum()) / 10 ** self.decimals
+
+    @property
+    def nbytes(self):
+        return self.asset_ids.nbytes + self.period_ordinals.nbytes + self.amounts.nbytes
+
+    def covered_periods(self, first_ordinal=None, last_ordinal=None):
+        ordinals = covered_period_ordinals(self.start_ordinals, self.elapsed)
+        if first_ordinal is not None:
+            ordinals = ordinals[ordinals >= first_ordinal]
+        if last_ordinal is not None:
+            ordinals = ordinals[ordinals <= last_ordinal]
+        return ordinals
+
+    def entry_slice(self, first_asset, last_asset):
+        # Entries are grouped by asset, so an asset range maps to one contiguous entry range.
+        lo, hi = np.searchsorted(self.asset_ids, [first_asset, last_asset])
+        return slice(int(lo), int(hi))
+
+    def pivot(self, first_ordinal=None, last_ordinal=None, assets=None, period_ordinals=None):
+        # Wide frame (Asset, period columns..., Total Depreciation, Original Cost, Original Salvage) for an asset slice
+        # (default all) and an inclusive ordinal window (default all periods). Totals are always to the provision date.
+        assets = assets or slice(0, self.num_assets)
+        first_asset, last_asset, _ = assets.indices(self.num_assets)
+        if period_ordinals is None:
+            period_ordinals = self.covered_periods(first_ordinal, last_ordinal)
+        entries = self.entry_slice(first_asset, last_asset)
+        period_ordinals = np.asarray(period_ordinals, dtype=np.int64)
+        entry_periods = self.period_ordinals[entries]
+        columns = np.searchsorted(period_ordinals, entry_periods)
+        in_window = columns < len(period_ordinals)
+        in_window[in_window] = period_ordinals[columns[in_window]] == entry_periods[in_window]
+        matrix = np.full((last_asset - first_asset, len(period_ordinals)), np.nan)
+        matrix[self.asset_ids[entries][in_window] - first_asset, columns[in_window]] = to_major_units(self.amounts[entries][in_window], self.decimals)
+        df_schedule = pd.DataFrame(matrix, columns=period_labels(period_ordinals, self.mode))
+        df_schedule.insert(0, "Asset", self.names[first_asset:last_asset])
+        df_schedule["Total Depreciation"] = to_major_units(self.totals[first_asset:last_asset], self.decimals)
+        df_schedule["Original Cost"] = self.costs[first_asset:last_asset]
+        df_schedule["Original Salvage"] = self.salvages[first_asset:last_asset]
+        return df_schedule
+
+    def yearly_rollup(self):
+        # Same schedule with monthly entries summed per calendar year; a Yearly store is returned unchanged.
+        if self.mode != "Monthly":
+            return self
+        entry_years = ordinal_years(self.period_ordinals, self.mode)
+        boundaries = np.flatnonzero((np.diff(self.asset_ids) != 0) | (np.diff(entry_years) != 0)) + 1
+        group_starts = np.concatenate(([0], boundaries)) if len(self.amounts) else np.empty(0, dtype=np.int64)
+        amounts = np.add.reduceat(self.amounts, group_starts) if len(group_starts) else self.amounts[:0]
+        start_years = ordinal_years(self.start_ordinals, self.mode)
+        last_years = ordinal_years(self.start_ordinals + self.elapsed - 1, self.mode)
+        elapsed_years = np.where(self.elapsed > 0, last_years - start_years + 1, 0)
+        return ScheduleStore("Yearly", self.names, self.costs, self.salvages, self.totals, start_years, elapsed_years, self.asset_ids[group_starts], entry_years[group_starts].astype(np.int32), amounts, self.decimals)
+
+    def iter_frames(self, chunk_rows=5_000, first_ordinal=None, last_ordinal=None):
+        # Wide frames of at most chunk_rows assets sharing one column set, for export.
+        period_ordinals = self.covered_periods(first_ordinal, last_ordinal)
+        for offset in range(0, max(self.num_assets, 1), chunk_rows):
+            yield self.pivot(assets=slice(offset, offset + chunk_rows), period_ordinals=period_ordinals)
+
+def expand_entries(terms, include_periods=True, first_offsets=None):
+    # Long-format (asset_ids, period_ordinals, amounts) for AssetTerms; asset ids are positions within terms.
+    # first_offsets (per asset) skips each asset's first periods, e.g. to expand only periods added since a snapshot.
+    elapsed = terms.elapsed if include_periods else np.zeros_like(terms.elapsed)
+    first_offsets = np.zeros_like(elapsed) if first_offsets is None else np.minimum(first_offsets, elapsed)
+    counts = elapsed - first_offsets
+    num_entries = int(counts.sum())
+    asset_ids = np.repeat(np.arange(len(elapsed), dtype=np.int32), counts)
+    entry_starts = np.cumsum(counts) - counts
+    offsets = np.arange(num_entries, dtype=np.int64) - np.repeat(entry_starts - first_offsets, counts)
+    period_ordinals = (np.repeat(terms.start_ordinals, counts) + offsets).astype(np.int32)
+    return asset_ids, period_ordinals, period_amounts(terms, asset_ids, offsets)
+
+def build_schedule_store(terms, names, costs, salvages, mode, include_periods=True, entries=None, decimals=DEFAULT_DECIMALS):
+    # include_periods=False keeps only per-asset totals (summary-only runs); entries passes precomputed expand_entries output.
+    asset_ids, period_ordinals, amounts = entries if entries is not None else expand_entries(terms, include_periods)
+    elapsed = terms.elapsed if include_periods else np.zeros_like(terms.elapsed)
+    return ScheduleStore(mode, list(names), np.asarray(costs, dtype=np.float64), np.asarray(salvages, dtype=np.float64), terms.totals, terms.start_ordinals, elapsed, asset_ids, period_ordinals, amounts, decimals)
@@ -0,0 +1,36 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from benchmarks.registers import mixed_method_register
+from depreciation_pro.books import book_difference_column, multi_book_report
+from depreciation_pro.constants import GAAP_USEFUL_LIVES
+from depreciation_pro.engine import to_minor_units
+from depreciation_pro.reports import build_reports
+
+BOOKS = list(GAAP_USEFUL_LIVES)
+
+def single_book_register(register, book):
+    # The register as a single-book run of `book` sees it: own lives for the book's own assets, the standard's
+    # default life for the rest, and units of production capped at what that life can use.
+    own = register["gaap_standard"] == book
+    lives = np.where(own, register["useful_life"], [GAAP_USEFUL_LIVES[book][asset_type] for asset_type in register["asset_type"]])
+    return register.assign(gaap_standard=book, useful_life=lives, total_units=np.minimum(register["total_units"], register["annual_units"] * lives))
+
+@pytest.mark.parametrize("mode", ["Monthly", "Yearly"])
+def test_multi_book_report_matches_one_run_per_book(mode):
+    register = mixed_method_register(1_500, date(2025, 12, 31), 13)
+    # Own lives off the standard defaults, so each book's lives really differ from the register's.
+    register["useful_life"] += np.random.default_rng(13).integers(1, 4, len(register))
+    df_books = multi_book_report(register, BOOKS, mode, date(2025, 12, 31))
+    nbv_by_book = {}
+    for book in BOOKS:
+        book_register = single_book_register(register, book)
+        _, _, df_nbv = build_reports(book_register, mode, date(2025, 12, 31))
+        assert df_books[f"Life ({book})"].tolist() == book_register["useful_life"].tolist()
+        assert df_books[f"Accumulated ({book})"].equals(df_nbv["Accumulated Depreciation"])
+        assert df_books[f"NBV ({book})"].equals(df_nbv["Net Book Value"])
+        nbv_by_book[book] = to_minor_units(df_nbv["Net Book Value"])
+    for book in BOOKS[1:]:
+        assert np.array_equal(to_minor_units(df_books[book_difference_column(book, BOOKS[0])]), nbv_by_book[book] - nbv_by_book[BOOKS[0]])
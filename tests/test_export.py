@@ -0,0 +1,51 @@
+import io
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from benchmarks.registers import synthetic_register
+from depreciation_pro import export
+from depreciation_pro.export import EXCEL_MAX_COLUMNS, EXCEL_MAX_ROWS, check_export, export_bytes, write_workbook
+from depreciation_pro.reports import build_reports, iter_schedule_frames
+
+@pytest.fixture(scope="module")
+def reports():
+    # Schedule chunks (several, sharing one set of period columns), summary and NBV of a small register.
+    register = synthetic_register(250, date(2025, 12, 31), 19)
+    _, df_summary, df_nbv = build_reports(register, "Monthly", date(2025, 12, 31), summary_only=True)
+    return list(iter_schedule_frames(register, "Monthly", date(2025, 12, 31), chunk_rows=60)), df_summary, df_nbv
+
+@pytest.mark.parametrize("export_format, read", [("CSV", pd.read_csv), ("Parquet", pd.read_parquet)])
+def test_schedule_round_trips_with_numeric_values(reports, export_format, read):
+    frames, df_summary, df_nbv = reports
+    if export_format == "Parquet":
+        pytest.importorskip("pyarrow")
+    df_read = read(io.BytesIO(export_bytes(iter(frames), df_summary, df_nbv, export_format)))
+    pd.testing.assert_frame_equal(df_read, pd.concat(frames, ignore_index=True))
+
+def test_excel_holds_schedule_summary_and_nbv_sheets(reports):
+    pytest.importorskip("openpyxl")
+    frames, df_summary, df_nbv = reports
+    sheets = pd.read_excel(io.BytesIO(export_bytes(iter(frames), df_summary, df_nbv, "Excel")), sheet_name=None)
+    assert list(sheets) == ["Schedule", "Summary", "NBV"]
+    pd.testing.assert_frame_equal(sheets["Schedule"], pd.concat(frames, ignore_index=True))
+    pd.testing.assert_frame_equal(sheets["NBV"], df_nbv)
+
+def test_check_export_enforces_excel_sheet_limits():
+    check_export("Excel", EXCEL_MAX_ROWS - 1, EXCEL_MAX_COLUMNS)
+    check_export("CSV", EXCEL_MAX_ROWS, EXCEL_MAX_COLUMNS + 1)
+    with pytest.raises(ValueError, match="row limit"):
+        check_export("Excel", EXCEL_MAX_ROWS, 10)
+    with pytest.raises(ValueError, match=f"{EXCEL_MAX_COLUMNS + 1:,} columns"):
+        check_export("Excel", 10, EXCEL_MAX_COLUMNS + 1)
+
+def test_workbook_stops_at_the_sheet_limits(monkeypatch):
+    pytest.importorskip("openpyxl")
+    monkeypatch.setattr(export, "EXCEL_MAX_ROWS", 5)
+    chunk = pd.DataFrame({"Asset": ["a", "b"], "Amount": [1.0, 2.0]})
+    write_workbook({"Schedule": [chunk, chunk]}, io.BytesIO())
+    with pytest.raises(ValueError, match="Sheet 'Schedule' exceeds"):
+        write_workbook({"Schedule": [chunk, chunk, chunk]}, io.BytesIO())
+    with pytest.raises(ValueError, match="Sheet 'Wide' has"):
+        write_workbook({"Wide": [pd.DataFrame(columns=range(EXCEL_MAX_COLUMNS + 1))]}, io.BytesIO())
@@ -0,0 +1,29 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from benchmarks.registers import mixed_method_register
+from depreciation_pro.engine import to_minor_units
+from depreciation_pro.forecast import FORECAST_STEPS, nbv_forecast
+from depreciation_pro.reports import build_reports
+
+def accumulated_at(register, mode, month_end):
+    _, _, df_nbv = build_reports(register, mode, month_end, summary_only=True)
+    return to_minor_units(df_nbv["Accumulated Depreciation"])
+
+@pytest.mark.parametrize("mode", ["Monthly", "Yearly"])
+@pytest.mark.parametrize("step", list(FORECAST_STEPS))
+def test_forecast_matches_a_summary_run_at_each_step(mode, step):
+    # Starts and ends mid-month, and covers assets placed in service during the forecast.
+    register = mixed_method_register(500, date(2026, 6, 30), 17)
+    forecast = nbv_forecast(register, mode, date(2025, 11, 15), date(2028, 2, 10), step)
+    df_totals = forecast.totals()
+    assert len(forecast.dates) == {"Month-End": 27, "Quarter-End": 9, "Year-End": 3}[step]
+    previous = accumulated_at(register, mode, {"Month-End": date(2025, 10, 31), "Quarter-End": date(2025, 9, 30), "Year-End": date(2024, 12, 31)}[step])
+    for i, month_end in enumerate(forecast.dates.tolist()):
+        accumulated = accumulated_at(register, mode, month_end)
+        assert np.array_equal(forecast.accumulated[:, i], accumulated), month_end
+        assert to_minor_units(df_totals["Depreciation in Step"].iloc[i]) == accumulated.sum() - previous.sum()
+        assert to_minor_units(df_totals["Net Book Value"].iloc[i]) == to_minor_units(register["cost"]).sum() - accumulated.sum()
+        previous = accumulated
@@ -0,0 +1,117 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.registers import mixed_method_register
+from depreciation_pro.books import multi_book_report
+from depreciation_pro.cache import ScheduleCache
+from depreciation_pro.constants import GAAP_USEFUL_LIVES
+from depreciation_pro.engine import depreciation_row
+from depreciation_pro.reports import build_reports
+from depreciation_pro.snapshots import SnapshotStore
+
+METHODS = ["Double-Declining Balance", "Sum-of-Years' Digits", "Units of Production", "Straight-Line"]
+NON_PERIOD_KEYS = ("Asset", "Total Depreciation", "Original Cost", "Original Salvage")
+
+# Year-by-year textbook schedules (float, minor units); Monthly mode spreads each year evenly over its months.
+def reference_annual_amounts(method, cost, salvage, life, total_units, annual_units):
+    base = max(cost - salvage, 0)
+    if method == "Sum-of-Years' Digits":
+        digits = life * (life + 1) / 2
+        return [base * (life - year + 1) / digits for year in range(1, life + 1)]
+    if method == "Units of Production":
+        amounts, used = [], 0
+        for _ in range(life):
+            units = min(annual_units, total_units - used)
+            used += units
+            amounts.append(base * units / total_units)
+        return amounts
+    # Double declining balance, switching to straight-line on the remaining book value once that is larger.
+    book_value, amounts, straight = cost, [], None
+    for year in range(1, life + 1):
+        declining = book_value * 2 / life
+        if straight is None and (book_value - salvage) / (life - year + 1) >= declining:
+            straight = (book_value - salvage) / (life - year + 1)
+        amount = straight if straight is not None else min(declining, max(book_value - salvage, 0))
+        amounts.append(amount)
+        book_value -= amount
+    return amounts
+
+def reference_cumulative(method, cost, salvage, life, total_units, annual_units, periods_per_year, periods):
+    # Cumulative minor units after `periods` periods; the last period of the life ends on the depreciable base.
+    base = round(max(cost - salvage, 0) * 100)
+    if periods >= life * periods_per_year:
+        return base
+    annual = reference_annual_amounts(method, cost * 100, salvage * 100, life, total_units, annual_units)
+    years, months = divmod(periods, periods_per_year)
+    return min(max(round(sum(annual[:years]) + annual[years] * months / periods_per_year), 0), base)
+
+@pytest.mark.parametrize("method", METHODS[:3])
+def test_kernels_match_year_by_year_reference(method):
+    rng = random.Random(METHODS.index(method))
+    for _ in range(500):
+        mode = rng.choice(["Monthly", "Yearly"])
+        cost = round(rng.uniform(0, 2e5), 2)
+        salvage = min(cost, round(rng.uniform(0, cost * 0.3), 2)) if rng.random() < 0.7 else 0.0
+        life = rng.randint(1, 20)
+        annual_units = rng.randint(1, 10_000)
+        total_units = rng.randint(1, annual_units * life)
+        start = date(2000, 1, 1) + timedelta(days=rng.randint(0, 9000))
+        provision = date(2000, 1, 1) + timedelta(days=rng.randint(0, 12000))
+        row, _ = depreciation_row("x", cost, salvage, start, life, mode, provision, method=method, total_units=total_units, annual_units=annual_units)
+        amounts = [value for label, value in row.items() if label not in NON_PERIOD_KEYS]
+        periods_per_year = 12 if mode == "Monthly" else 1
+        cumulative = [reference_cumulative(method, cost, salvage, life, total_units, annual_units, periods_per_year, k) for k in range(len(amounts) + 1)]
+        expected = [(cumulative[k + 1] - cumulative[k]) / 100 for k in range(len(amounts))]
+        assert all(amount >= 0 for amount in amounts)
+        assert amounts == pytest.approx(expected, abs=0.0101)
+        assert round(row["Total Depreciation"] * 100) == round(sum(round(amount * 100) for amount in amounts))
+        assert abs(round(row["Total Depreciation"] * 100) - cumulative[-1]) <= 1
+
+def assert_same_schedule(store, expected):
+    for field in ["totals", "elapsed", "asset_ids", "period_ordinals", "amounts"]:
+        assert np.array_equal(getattr(store, field), getattr(expected, field)), field
+
+@pytest.mark.parametrize("mode", ["Monthly", "Yearly"])
+def test_full_life_schedules_sum_to_the_depreciable_base(mode):
+    register = mixed_method_register(2_000, date(2020, 12, 31), 5)
+    schedule_store, _, _ = build_reports(register, mode, date(2085, 12, 31))
+    per_asset = np.bincount(schedule_store.asset_ids, weights=schedule_store.amounts, minlength=schedule_store.num_assets).astype(np.int64)
+    bases = np.maximum(np.rint(register["cost"] * 100) - np.rint(register["salvage"] * 100), 0).astype(np.int64).to_numpy()
+    assert np.array_equal(per_asset, schedule_store.totals)
+    assert np.array_equal(schedule_store.totals, bases)
+
+@pytest.mark.parametrize("mode", ["Monthly", "Yearly"])
+def test_cache_parallel_and_snapshot_paths_match_a_plain_run(mode, tmp_path):
+    register = mixed_method_register(3_000, date(2025, 12, 31), 9)
+    expected, expected_summary, expected_nbv = build_reports(register, mode, date(2026, 3, 31))
+    cache = ScheduleCache()
+    build_reports(register.iloc[::2].reset_index(drop=True), mode, date(2026, 3, 31), cache=cache)
+    cached, cached_summary, cached_nbv = build_reports(register, mode, date(2026, 3, 31), cache=cache)
+    assert_same_schedule(cached, expected)
+    assert cached_summary.equals(expected_summary) and cached_nbv.equals(expected_nbv)
+    shuffled = register.sample(frac=1, random_state=0).reset_index(drop=True)
+    assert_same_schedule(build_reports(shuffled, mode, date(2026, 3, 31), cache=cache)[0], build_reports(shuffled, mode, date(2026, 3, 31))[0])
+    assert cache.stats()["hits"] == 1_500 + 3_000 and cache.stats()["misses"] == 1_500 + 1_500
+    parallel, _, _ = build_reports(register, mode, date(2026, 3, 31), workers=2, shard_rows=700)
+    assert_same_schedule(parallel, expected)
+    snapshots = SnapshotStore(tmp_path)
+    build_reports(register, mode, date(2024, 6, 30), snapshots=snapshots, register_id="r")
+    rolled, _, _ = build_reports(register, mode, date(2026, 3, 31), snapshots=snapshots, register_id="r")
+    assert snapshots.last_run["reused"] > 0
+    assert_same_schedule(rolled, expected)
+
+def test_units_of_production_books_spread_units_over_each_book_life():
+    # An IFRS vehicle (7 years, 1,000 of 7,000 units a year) in the US GAAP book (5 years) can only use 5,000 units.
+    register = pd.DataFrame({"name": ["Truck"], "cost": [60_000.0], "salvage": [10_000.0], "start_date": pd.to_datetime(["2020-01-01"]), "gaap_standard": ["IFRS"], "asset_type": ["Vehicle"], "useful_life": [7], "method": ["Units of Production"], "total_units": [7_000], "annual_units": [1_000]})
+    us_gaap_register = register.assign(gaap_standard="US GAAP", useful_life=GAAP_USEFUL_LIVES["US GAAP"]["Vehicle"], total_units=5_000)
+    accumulated = []
+    for year in range(2020, 2028):
+        df_books = multi_book_report(register, ["IFRS", "US GAAP"], "Yearly", date(year, 12, 31))
+        for book, book_register in [("IFRS", register), ("US GAAP", us_gaap_register)]:
+            assert df_books[f"Accumulated ({book})"].iloc[0] == build_reports(book_register, "Yearly", date(year, 12, 31))[1]["Accumulated Depreciation"].iloc[0]
+        accumulated.append(df_books["Accumulated (US GAAP)"].iloc[0])
+    assert np.diff([0.0] + accumulated).tolist() == [10_000.0] * 5 + [0.0] * 3
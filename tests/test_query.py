@@ -0,0 +1,28 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from benchmarks.registers import mixed_method_register
+from depreciation_pro.periods import period_ordinal
+from depreciation_pro.query import ScheduleIndex
+from depreciation_pro.reports import build_reports
+
+DATE_RANGES = [
+    (date(1990, 1, 1), date(2025, 12, 31)),  # everything up to the provision date
+    (date(2003, 2, 14), date(2011, 9, 3)),  # dates inside their periods
+    (date(2024, 6, 1), date(2024, 6, 30)),  # a single period
+    (date(2025, 7, 1), date(2031, 12, 31)),  # running past the provision date
+    (date(2025, 1, 1), date(2024, 1, 1)),  # reversed
+]
+
+@pytest.mark.parametrize("mode", ["Monthly", "Yearly"])
+def test_between_dates_matches_a_sum_over_the_store_entries(mode):
+    store, _, _ = build_reports(mixed_method_register(1_000, date(2025, 12, 31), 11), mode, date(2025, 12, 31))
+    index = ScheduleIndex(store)
+    for start_date, end_date in DATE_RANGES:
+        in_range = (store.period_ordinals >= period_ordinal(start_date, mode)) & (store.period_ordinals <= period_ordinal(end_date, mode))
+        expected = np.zeros(store.num_assets, dtype=np.int64)
+        np.add.at(expected, store.asset_ids[in_range], store.amounts[in_range])
+        assert np.array_equal(index.between_dates(start_date, end_date), expected), (start_date, end_date)
+    assert np.array_equal(index.accumulated_at(period_ordinal(date(2025, 12, 31), mode)), store.totals)
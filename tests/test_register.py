@@ -0,0 +1,37 @@
+import io
+
+import pandas as pd
+import pytest
+
+from depreciation_pro.register import load_asset_register
+
+def load_csv(rows, chunk_rows=1, columns="name,cost,in_service_date,gaap_standard,asset_type,useful_life,method,total_units,annual_units"):
+    return load_asset_register(io.StringIO("\n".join([columns, *rows])), "register.csv", chunk_rows)
+
+@pytest.mark.parametrize("chunk_rows", [1, 2, 50])
+def test_day_first_dates_read_with_the_first_date_format_in_every_chunk(chunk_rows):
+    # 25/01/2020 can only be day-first, so 05/02/2020 and 12/03/2020 in later chunks must be too.
+    register = load_csv(["a,100,25/01/2020,US GAAP,Building,,,,", "b,100,05/02/2020,US GAAP,Building,,,,", "c,100,12/03/2020,US GAAP,Building,,,,"], chunk_rows)
+    assert register["start_date"].tolist() == [pd.Timestamp(2020, 1, 25), pd.Timestamp(2020, 2, 5), pd.Timestamp(2020, 3, 12)]
+
+def test_dates_in_another_format_than_the_first_are_rejected():
+    with pytest.raises(ValueError, match=r"invalid in-service date \(expected the format %d/%m/%Y .*\(rows 3\)"):
+        load_csv(["a,100,25/01/2020,US GAAP,Building,,,,", "b,100,2020-02-05,US GAAP,Building,,,,"])
+
+@pytest.mark.parametrize("row, problem", [
+    ("a,100,2020-01-01,Swiss GAAP,Building,,,,", "unknown GAAP standard"),
+    ("a,100,2020-01-01,US GAAP,Building,,Reducing Balance,,", "unknown depreciation method"),
+    ("a,100,2020-01-01,US GAAP,Machinery,5,Units of Production,,1000", "units of production needs total_units >= 1"),
+    ("a,100,2020-01-01,US GAAP,Machinery,5,Units of Production,6000,1000", "units of production needs annual_units x useful_life >= total_units"),
+    ("a,100,2020-01-01,US GAAP,Bulding,,,,", "blank useful life needs an asset type"),
+    ("a,100,2020-01-01,US GAAP,Building,1000000000000,,,", "useful life must be a whole number from 1 to 100"),
+])
+def test_invalid_rows_are_rejected_with_their_row_number(row, problem):
+    with pytest.raises(ValueError, match=rf"{problem}.*\(rows 3\)"):
+        load_csv(["ok,100,2020-01-01,US GAAP,Building,,,,", row])
+
+def test_valid_rows_are_normalized():
+    register = load_csv(["a,100,2020-01-01,IFRS,vehicle,,DDB,,", "b,50,2020-06-30,US GAAP,Machinery,4,Units of Production,4000,1000"])
+    assert register["asset_type"].tolist() == ["Vehicle", "Machinery"]
+    assert register["useful_life"].tolist() == [7, 4]
+    assert register["method"].tolist() == ["Double-Declining Balance", "Units of Production"]
@@ -0,0 +1,46 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from benchmarks.registers import synthetic_register
+from depreciation_pro.reports import build_reports
+from depreciation_pro.snapshots import SnapshotStore
+
+def assert_same_run(rolled, expected):
+    for field in ["totals", "elapsed", "asset_ids", "period_ordinals", "amounts"]:
+        assert np.array_equal(getattr(rolled[0], field), getattr(expected[0], field)), field
+    assert rolled[1].equals(expected[1]) and rolled[2].equals(expected[2])
+
+def roll(register, mode, provision, snapshots):
+    return build_reports(register, mode, provision, snapshots=snapshots, register_id="register")
+
+@pytest.mark.parametrize("mode", ["Monthly", "Yearly"])
+def test_month_end_rolls_match_a_full_compute(mode, tmp_path):
+    register = synthetic_register(2_000, date(2025, 12, 31), 3)
+    snapshots = SnapshotStore(tmp_path)
+    roll(register, mode, date(2025, 10, 31), snapshots)
+    for provision in [date(2025, 11, 30), date(2025, 12, 31), date(2026, 1, 31), date(2026, 1, 31)]:
+        entries_path = snapshots.paths("register", mode)[1]
+        entries_written = entries_path.stat().st_mtime_ns
+        assert_same_run(roll(register, mode, provision, snapshots), build_reports(register, mode, provision))
+        assert snapshots.last_run["reused"] == len(register) and snapshots.last_run["recomputed"] == 0
+        # A roll that adds no periods keeps the entries file it read.
+        assert (entries_path.stat().st_mtime_ns == entries_written) == (snapshots.last_run["new_entries"] == 0)
+
+def test_edited_register_recomputes_only_changed_assets(tmp_path):
+    register = synthetic_register(2_000, date(2025, 12, 31), 4)
+    snapshots = SnapshotStore(tmp_path)
+    roll(register, "Monthly", date(2025, 11, 30), snapshots)
+    edited = register.drop(index=range(0, len(register), 10)).reset_index(drop=True)
+    edited.loc[::50, "salvage"] += 1.0
+    assert_same_run(roll(edited, "Monthly", date(2025, 12, 31), snapshots), build_reports(edited, "Monthly", date(2025, 12, 31)))
+    assert snapshots.last_run["recomputed"] == len(edited[::50])
+
+def test_summary_only_runs_do_not_touch_snapshots(tmp_path):
+    register = synthetic_register(500, date(2025, 12, 31), 5)
+    snapshots = SnapshotStore(tmp_path)
+    expected = build_reports(register, "Monthly", date(2025, 12, 31), summary_only=True)
+    rolled = build_reports(register, "Monthly", date(2025, 12, 31), summary_only=True, snapshots=snapshots, register_id="register")
+    assert rolled[1].equals(expected[1]) and rolled[2].equals(expected[2])
+    assert not any(tmp_path.iterdir())